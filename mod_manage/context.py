@@ -8,6 +8,21 @@ class Config(BaseConfig):
     # ---------- [语言设置] ----------
     language: str = Field(default="", description="界面显示语言 en_us/zh_cn")
 
+    # ---------- [配置文件] ----------
+    config_watch: bool = Field(
+        default=False,
+        description="是否监视配置文件的外部修改并自动重新加载（每秒检查一次）",
+    )
+
+    # ---------- [日志] ----------
+    log_archive_keep: int = Field(
+        default=20, description="保留的日志归档数量（0 为不限）"
+    )
+    log_archive_max_bytes: int = Field(
+        default=100 * 1024 * 1024,
+        description="日志归档总大小上限（字节，0 为不限），超出后删除最旧的归档",
+    )
+
     # ---------- [UI设置] ----------
     light_mode: str = Field(default="Auto", description="明亮模式选项 Auto/Light/Dark")
     vague_mode: bool = Field(default=True, description="是否启用模糊效果")
@@ -23,6 +38,17 @@ class Config(BaseConfig):
 
     # ---------- [RE框架] ----------
     installed_ref_version: str = Field(default="", description="已安装的RE框架版本")
+    installed_ref_digest: str = Field(
+        default="", description="已安装的RE框架安装包 sha256（自动维护）"
+    )
+    ref_asset_pattern: str = Field(
+        default="MHWILDS.zip",
+        description="Release 中要安装的资源文件名（支持通配符，不区分大小写）",
+    )
+    ref_snapshot_keep: int = Field(
+        default=5,
+        description="本地保留的RE框架版本快照数量，用于快速切换版本（0 为不保留）",
+    )
 
     # ---------- [Github] ----------
     proxy_mode: bool = Field(default=False, description="Github 是否启用代理")
@@ -30,9 +56,62 @@ class Config(BaseConfig):
         default="https://api-gh.muran.eu.org/",
         description="代理服务器地址（示例：https://ghproxy.com/）",
     )
+    proxy_urls: list = Field(default=[], description="额外的备用代理服务器地址列表")
+    mirror_racing: bool = Field(
+        default=True,
+        description="是否对直连及已启用的代理测速并自动选择最快的下载线路"
+        "（proxy_url 仅在 proxy_mode 开启时参与，proxy_urls 始终参与）",
+    )
+    mirror_ttl: int = Field(default=1800, description="线路测速结果的缓存时间（秒）")
+    release_cache_ttl: int = Field(
+        default=600,
+        description="Release 列表缓存的有效期（秒），期内启动不再请求 GitHub",
+    )
+
+    # ---------- [下载设置] ----------
+    download_dir: str = Field(
+        default="downloads", description="下载文件及断点续传数据的保存目录"
+    )
+    download_segments: int = Field(
+        default=4, description="分段下载的最大并发连接数（1 为关闭分段下载）"
+    )
+    download_min_segment_size: int = Field(
+        default=4 * 1024 * 1024, description="分段下载每段的最小字节数"
+    )
+
+    download_parallel: int = Field(default=3, description="同时进行的下载任务数")
+    bandwidth_limit: int = Field(
+        default=0, description="全局下载带宽上限（字节/秒，0 为不限速）"
+    )
+    stall_timeout: int = Field(
+        default=15, description="下载超过该秒数没有收到数据时切换到下一条线路"
+    )
+
+    # ---------- [安装设置] ----------
+    delta_sync: bool = Field(
+        default=True,
+        description="目录规则是否增量同步（仅写入变化的文件并删除多余文件）",
+    )
+
+    copy_workers: int = Field(
+        default=1,
+        description="安装时并行解压文件的线程数（1 为串行，不超过CPU核心数）",
+    )
+
+    # ---------- [下载缓存] ----------
+    cache_dir: str = Field(default="cache", description="下载缓存目录")
+    cache_max_bytes: int = Field(
+        default=2 * 1024 * 1024 * 1024,
+        description="下载缓存容量上限（字节，0 为关闭缓存），超出后淘汰最久未使用的文件",
+    )
 
     # ---------- [MOD管理] ----------
-    installed_mods: dict = Field(default={}, description="已安装的MOD列表（自动维护）")
+    installed_mods: dict = Field(
+        default={}, description="旧版本的已安装MOD列表，启动时自动迁移到MOD登记数据库"
+    )
+    mod_registry_path: str = Field(
+        default="mods.db", description="已安装MOD登记数据库（SQLite）的路径"
+    )
 
 
 class GlobalContext(object):
@@ -41,13 +120,23 @@ class GlobalContext(object):
         _log_system = LogSystem(debug=debug)
         try:
             _config = Config.load()
+            if _config.config_watch:
+                _config.watch()
         except ConfigError as e:
             _log_system.logger.error(f"配置操作失败: {str(e)}")
+        else:
+            _log_system.start_archiver(
+                _config.log_archive_keep, _config.log_archive_max_bytes
+            )
 
     @staticmethod
     def get_logger() -> Logger:
         return _log_system.logger
 
+    @staticmethod
+    def flush_logs() -> None:
+        _log_system.flush()
+
     @staticmethod
     def get_config() -> Config:
         return _config
@@ -1,11 +1,12 @@
+import os
+import queue
 import logging
 import zipfile
 import datetime
 import atexit
-import time
-import shutil
+import threading
 from pathlib import Path
-from logging.handlers import RotatingFileHandler
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from logging import Formatter
 
 
@@ -24,6 +25,7 @@ class ColoredMultiLineFormatter(Formatter):
     def __init__(self, use_color=False):
         super().__init__()
         self.use_color = use_color
+        self._time_cache = (None, "")  # (整数秒, 格式化后的时间)
 
     def _colorize_level(self, level_name):
         """为日志级别添加颜色"""
@@ -33,20 +35,26 @@ class ColoredMultiLineFormatter(Formatter):
 
     def format(self, record):
         """核心格式化方法"""
-        # 生成基础组件
-        timestamp = datetime.datetime.fromtimestamp(record.created).strftime(
-            "%Y-%m-%d %H:%M:%S"
-        )
+        # 生成基础组件，同一秒内的记录复用已格式化的时间
+        second = int(record.created)
+        cached_second, timestamp = self._time_cache
+        if second != cached_second:
+            timestamp = datetime.datetime.fromtimestamp(second).strftime(
+                "%Y-%m-%d %H:%M:%S"
+            )
+            self._time_cache = (second, timestamp)
         colored_level = self._colorize_level(record.levelname)
         thread_name = record.threadName
 
         # 构建前缀模板
         header_prefix = f"[{timestamp}][{colored_level}][{thread_name}]"
-        plain_prefix = f"[{timestamp}][{record.levelname}][{thread_name}]"
-        line_prefix = " " * len(plain_prefix)  # 基于无颜色文本计算空格
 
-        # 处理消息内容
+        # 处理消息内容，单行消息无需拆分重组
         message = super().format(record)
+        if message and "\n" not in message and "\r" not in message:
+            return f"{header_prefix} {message}"
+        plain_prefix = f"[{timestamp}][{record.levelname}][{thread_name}]"
+        line_prefix = " " * len(plain_prefix)  # 基于无颜色文本计算空格
         lines = message.splitlines()
 
         # 重组多行内容
@@ -70,11 +78,12 @@ class LogSystem(object):
         atexit.register(self.safe_exit)
 
     def _setup_directories(self):
-        """创建日志目录并清理空文件"""
+        """创建日志目录，清理空文件并留存上次异常退出遗留的日志"""
         self.logs_dir.mkdir(exist_ok=True)
         # 清理可能存在的空文件
         if self.latest_log.exists() and self.latest_log.stat().st_size == 0:
             self.latest_log.unlink()
+        self._detach_latest()
 
     def _configure_logging(self):
         """配置日志系统"""
@@ -100,53 +109,107 @@ class LogSystem(object):
         console_handler.setFormatter(console_formatter)
         console_handler.setLevel(logging.DEBUG if self.debug else logging.INFO)
 
-        # 添加处理器
-        self.logger.addHandler(self.file_handler)
-        self.logger.addHandler(console_handler)
+        # 调用方只把记录放入队列，格式化和文件/终端输出由后台监听线程完成
+        self._queue = queue.Queue()
+        self._listener = QueueListener(
+            self._queue, self.file_handler, console_handler, respect_handler_level=True
+        )
+        self._listener.start()
+        self.logger.addHandler(QueueHandler(self._queue))
+
+    def flush(self):
+        """等待队列中已有的日志全部输出（如在终端提示输入前调用）"""
+        if self._listener is not None:
+            self._queue.join()
 
     def safe_exit(self):
-        """安全退出处理"""
+        """安全退出处理：关闭处理器后只重命名日志，压缩留到下次启动时在后台完成"""
         try:
             # 关闭所有日志处理器
             self._close_handlers()
-            # 等待文件句柄释放
-            time.sleep(0.5)
-            # 执行归档
-            self.archive_logs()
+            self._detach_latest()
         except Exception as e:
             print(f"退出处理失败: {str(e)}")
 
     def _close_handlers(self):
-        """关闭并移除所有文件处理器"""
+        """停止队列监听（输出剩余记录）后关闭并移除所有文件处理器"""
+        if self._listener is not None:
+            self._listener.stop()
+            for handler in self._listener.handlers:
+                if isinstance(handler, logging.FileHandler):
+                    handler.close()
+            self._listener = None
         for handler in self.logger.handlers[:]:
-            if isinstance(handler, logging.FileHandler):
+            if isinstance(handler, (logging.FileHandler, QueueHandler)):
                 handler.close()
                 self.logger.removeHandler(handler)
         logging.shutdown()
 
-    def archive_logs(self):
-        """安全归档日志文件"""
-        if not self.latest_log.exists() or self.latest_log.stat().st_size == 0:
+    def _detach_latest(self):
+        """将 latest.log 重命名为待归档的 log_<时间>.log"""
+        if not self.latest_log.exists():
             return
-
+        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
+        pending = self.logs_dir / f"log_{timestamp}.log"
+        suffix = 1
+        while pending.exists() or pending.with_suffix(".zip").exists():
+            pending = self.logs_dir / f"log_{timestamp}_{suffix}.log"
+            suffix += 1
         try:
-            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-            archive_name = f"log_{timestamp}.zip"
-            archive_path = self.logs_dir / archive_name
-
-            # 使用临时副本进行压缩
-            temp_log = self.logs_dir / f"temp_{timestamp}.log"
-            shutil.copyfile(self.latest_log, temp_log)
-
-            with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as zipf:
-                zipf.write(temp_log, arcname=f"{timestamp}.log")
-
-            temp_log.unlink()
-            self.latest_log.unlink()
-            print(f"日志已归档至: {archive_path}")
-
-        except Exception as e:
-            print(f"归档日志失败: {str(e)}")
+            os.replace(self.latest_log, pending)
+        except OSError as e:
             # 保留日志文件供下次启动处理
-            if temp_log.exists():
-                temp_log.unlink()
+            print(f"归档日志失败: {str(e)}")
+
+    def start_archiver(self, keep_count: int, max_bytes: int) -> threading.Thread:
+        """
+        在后台压缩待归档的日志并按保留策略清理旧归档
+
+        :param keep_count: 保留的归档数量（0 为不限）
+        :param max_bytes: 归档总大小上限（字节，0 为不限）
+        """
+        thread = threading.Thread(
+            target=self.archive_logs,
+            args=(keep_count, max_bytes),
+            name="LogArchiver",
+            daemon=True,
+        )
+        thread.start()
+        return thread
+
+    def archive_logs(self, keep_count: int = 0, max_bytes: int = 0):
+        """
+        压缩所有待归档的日志，然后清理超出保留策略的旧归档
+
+        压缩直接从日志文件流式写入临时 zip，完成后再替换为正式文件并删除原日志，
+        中途退出时原日志保留，下次启动重新压缩
+        """
+        for temp_zip in self.logs_dir.glob("log_*.zip.tmp"):
+            temp_zip.unlink()
+        for pending in sorted(self.logs_dir.glob("log_*.log")):
+            archive_path = pending.with_suffix(".zip")
+            temp_zip = archive_path.with_name(archive_path.name + ".tmp")
+            try:
+                with zipfile.ZipFile(temp_zip, "w", zipfile.ZIP_DEFLATED) as zipf:
+                    zipf.write(pending, arcname=f"{pending.stem[4:]}.log")
+                os.replace(temp_zip, archive_path)
+                pending.unlink()
+            except OSError as e:
+                self.logger.warning(f"归档日志失败: {str(e)}")
+                if temp_zip.exists():
+                    temp_zip.unlink()
+        self._prune_archives(keep_count, max_bytes)
+
+    def _prune_archives(self, keep_count: int, max_bytes: int):
+        """从最旧的归档开始删除，直到数量和总大小都不超过上限"""
+        # 文件名中含时间，按名称倒序即为从新到旧
+        archives = sorted(self.logs_dir.glob("log_*.zip"), reverse=True)
+        total = 0
+        for index, archive in enumerate(archives):
+            total += archive.stat().st_size
+            over_count = keep_count and index >= keep_count
+            if over_count or (max_bytes and total > max_bytes):
+                try:
+                    archive.unlink()
+                except OSError:
+                    pass
@@ -0,0 +1,181 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from typing import Dict, List, Optional, Tuple
+
+
+class ArtifactCache:
+    """
+    下载产物缓存
+
+    文件按 sha256 内容寻址保存在 objects/ 下，index.json 记录 URL/标签到摘要的映射
+    以及每个对象的大小和最近使用时间，总大小超出预算时按最近最少使用（LRU）淘汰。
+    每次操作都会重新读取索引，多个实例共享同一目录时数据保持一致。
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._objects_dir = os.path.join(cache_dir, "objects")
+        self._index_path = os.path.join(cache_dir, "index.json")
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def lookup(self, *keys: str) -> Optional[str]:
+        """按 URL/标签查找缓存文件，命中时刷新使用时间并返回路径"""
+        with self._lock:
+            index = self._load_index()
+            for key in keys:
+                digest = index["keys"].get(key)
+                if not digest:
+                    continue
+                path = self._object_path(digest)
+                if not os.path.exists(path):
+                    # 对象文件被外部删除，清理索引
+                    self._drop_locked(index, digest)
+                    continue
+                index["objects"][digest]["last_used"] = time.time()
+                for other in keys:
+                    index["keys"][other] = digest
+                self._save_index(index)
+                return path
+        return None
+
+    def store(self, path: str, keys: List[str], digest: str = None) -> str:
+        """
+        将文件移入缓存并建立索引，返回缓存中的路径
+
+        :param path: 待缓存文件（会被移动）
+        :param keys: 索引键（URL、标签等）
+        :param digest: 已知的 sha256，未提供时读取文件计算
+        """
+        digest = digest or self._hash_file(path)
+        target = self._object_path(digest)
+        os.makedirs(os.path.dirname(target), exist_ok=True)
+        with self._lock:
+            if os.path.exists(target):
+                os.remove(path)  # 内容相同，直接复用已有对象
+            else:
+                # 下载目录与缓存目录可能位于不同磁盘，os.replace 会失败；
+                # shutil.move 跨盘时改为复制，先移到临时名再替换，避免出现不完整的对象
+                temp_path = target + ".tmp"
+                shutil.move(path, temp_path)
+                os.replace(temp_path, target)
+            index = self._load_index()
+            index["objects"][digest] = {
+                "size": os.path.getsize(target),
+                "last_used": time.time(),
+            }
+            for key in keys:
+                index["keys"][key] = digest
+            # 刚写入的对象即将被使用，本次不参与淘汰
+            self._evict_locked(index, self.max_bytes, protect=digest)
+            self._save_index(index)
+        return target
+
+    def discard(self, path: str) -> None:
+        """移除指定缓存文件（例如发现其内容损坏）"""
+        digest = os.path.basename(path)
+        with self._lock:
+            index = self._load_index()
+            self._drop_locked(index, digest)
+            self._save_index(index)
+
+    def prune(self, max_bytes: int = None) -> Tuple[int, int]:
+        """
+        按 LRU 淘汰到指定容量以内
+
+        :param max_bytes: 保留容量，默认使用配置预算，0 表示清空
+        :return: (删除的文件数, 释放的字节数)
+        """
+        budget = self.max_bytes if max_bytes is None else max_bytes
+        with self._lock:
+            index = self._load_index()
+            result = self._evict_locked(index, budget)
+            self._save_index(index)
+        return result
+
+    def stats(self) -> Dict:
+        """返回缓存概况及按最近使用排序的条目"""
+        with self._lock:
+            index = self._load_index()
+        keys_by_digest: Dict[str, List[str]] = {}
+        for key, digest in index["keys"].items():
+            keys_by_digest.setdefault(digest, []).append(key)
+        entries = [
+            {
+                "digest": digest,
+                "size": info["size"],
+                "last_used": info["last_used"],
+                "keys": keys_by_digest.get(digest, []),
+            }
+            for digest, info in index["objects"].items()
+        ]
+        entries.sort(key=lambda item: item["last_used"], reverse=True)
+        return {
+            "count": len(entries),
+            "total_bytes": sum(item["size"] for item in entries),
+            "max_bytes": self.max_bytes,
+            "entries": entries,
+        }
+
+    def _evict_locked(
+        self, index: Dict, budget: int, protect: str = None
+    ) -> Tuple[int, int]:
+        """按最近使用时间从旧到新删除对象，直到总大小不超过 budget"""
+        total = sum(info["size"] for info in index["objects"].values())
+        removed = freed = 0
+        for digest, info in sorted(
+            index["objects"].items(), key=lambda item: item[1]["last_used"]
+        ):
+            if total <= budget:
+                break
+            if digest == protect:
+                continue
+            total -= info["size"]
+            freed += info["size"]
+            removed += 1
+            self._drop_locked(index, digest)
+        return removed, freed
+
+    def _drop_locked(self, index: Dict, digest: str) -> None:
+        index["objects"].pop(digest, None)
+        for key in [k for k, v in index["keys"].items() if v == digest]:
+            del index["keys"][key]
+        path = self._object_path(digest)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self._objects_dir, digest[:2], digest)
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            index.setdefault("objects", {})
+            index.setdefault("keys", {})
+            return index
+        except (OSError, ValueError):
+            return {"objects": {}, "keys": {}}
+
+    def _save_index(self, index: Dict) -> None:
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp_path = self._index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(temp_path, self._index_path)
+
+    @staticmethod
+    def _hash_file(path: str) -> str:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+        return sha256.hexdigest()
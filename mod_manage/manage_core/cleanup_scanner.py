@@ -0,0 +1,104 @@
+import os
+import re
+import fnmatch
+from pathlib import Path
+from typing import FrozenSet, Iterator, List, Pattern, Tuple
+
+State = Tuple[int, int]  # (模式序号, 下一个待匹配的路径段序号)
+
+
+class PatternMatcher:
+    """
+    将多个 glob 模式（语义同 Path.glob，支持 "**"）编译为按路径段推进的匹配器，
+    一次遍历即可同时匹配全部模式
+    """
+
+    def __init__(self, patterns: List[str]):
+        flags = re.IGNORECASE if os.name == "nt" else 0
+        self._patterns: List[List[Pattern]] = []
+        self._dirs_only: List[bool] = []
+        for pattern in patterns:
+            parts = [
+                p for p in pattern.replace("\\", "/").split("/") if p not in ("", ".")
+            ]
+            self._patterns.append(
+                [
+                    None if p == "**" else re.compile(fnmatch.translate(p), flags)
+                    for p in parts
+                ]
+            )
+            # 以 "**" 结尾的模式只匹配目录
+            self._dirs_only.append(bool(parts) and parts[-1] == "**")
+
+    def initial(self) -> FrozenSet[State]:
+        return self._closure({(index, 0) for index in range(len(self._patterns))})
+
+    def step(
+        self, states: FrozenSet[State], name: str, is_dir: bool
+    ) -> Tuple[FrozenSet[State], bool]:
+        """
+        消耗一个路径段
+
+        :return: (进入该目录后的状态集合, 该条目是否被某个模式完整匹配)
+        """
+        advanced = set()
+        for index, pos in states:
+            parts = self._patterns[index]
+            if pos >= len(parts):
+                continue
+            if parts[pos] is None:
+                if is_dir:
+                    advanced.add((index, pos))  # "**" 继续吞掉目录
+            elif parts[pos].match(name):
+                advanced.add((index, pos + 1))
+        advanced = self._closure(advanced)
+
+        matched = any(
+            pos == len(self._patterns[index]) and (is_dir or not self._dirs_only[index])
+            for index, pos in advanced
+        )
+        # 只保留仍可能匹配更深层条目的状态
+        alive = frozenset(
+            (index, pos) for index, pos in advanced if pos < len(self._patterns[index])
+        )
+        return alive, matched
+
+    def _closure(self, states) -> FrozenSet[State]:
+        """展开空转移（"**" 可以匹配零个目录）"""
+        result = set(states)
+        stack = list(states)
+        while stack:
+            index, pos = stack.pop()
+            parts = self._patterns[index]
+            if (
+                pos < len(parts)
+                and parts[pos] is None
+                and (index, pos + 1) not in result
+            ):
+                result.add((index, pos + 1))
+                stack.append((index, pos + 1))
+        return frozenset(result)
+
+
+def iter_matches(root: Path, patterns: List[str]) -> Iterator[Tuple[Path, bool]]:
+    """
+    单次 os.scandir 遍历 root，产出匹配任一模式的 (路径, 是否目录)
+
+    已匹配的目录及不可能再产生匹配的目录不会继续深入，调用方可在迭代中直接删除产出的条目
+    """
+    matcher = PatternMatcher(patterns)
+    stack = [(str(root), matcher.initial())]
+    while stack:
+        directory, states = stack.pop()
+        try:
+            with os.scandir(directory) as it:
+                entries = list(it)
+        except OSError:
+            continue
+        for entry in entries:
+            is_dir = entry.is_dir(follow_symlinks=False)
+            alive, matched = matcher.step(states, entry.name, is_dir)
+            if matched:
+                yield Path(entry.path), is_dir
+            elif is_dir and alive:
+                stack.append((entry.path, alive))
@@ -1,8 +1,10 @@
 import sys
 import asyncio
+import datetime
 
 from urllib.parse import urlparse, urlunparse
 
+from .artifact_cache import ArtifactCache
 from .ref_core import RefManage
 from .sso_login import main as sso_main
 from ..context import GlobalContext
@@ -10,6 +12,12 @@ from ..i18n import i18n, t
 from ..tools import validate_game_path
 
 
+def _input(prompt: str = "") -> str:
+    """日志由后台线程输出，提示输入前先等待已有日志显示完毕"""
+    GlobalContext.flush_logs()
+    return input(prompt)
+
+
 class CliSystem(object):
     def __init__(self):
         self._log_system = GlobalContext.get_logger()
@@ -18,8 +26,9 @@ class CliSystem(object):
         if not self._config.language:
             self._setup_lang()
         self._log_system.info(t("welcome.init"))
-        self._log_system.info(t("cli.ref_getting"))
+        # Release 列表在后台加载，不阻塞主菜单
         self._ref_core = RefManage()
+        self._ref_core.load_async()
         self._log_system.info(
             t(
                 "cli.game_path_known",
@@ -34,7 +43,7 @@ class CliSystem(object):
 
     def _setup_lang(self):
         """初始化语言"""
-        match input("Press Language: [ZH_CN/en_us] "):
+        match _input("Press Language: [ZH_CN/en_us] "):
             case "zh_cn":
                 lang = "zh_cn"
             case "en_us":
@@ -57,10 +66,11 @@ class CliSystem(object):
             "2": self._game_manage,
             "3": self._nexus_manage,
             "4": self._mod_manage,
+            "5": self._cache_manage,
         }
         while True:
             self._log_system.info(t("cli.menu"))
-            num = input(t("cli.wait_press"))
+            num = _input(t("cli.wait_press"))
             if num in command_list.keys():
                 command_list[num]()
             else:
@@ -73,8 +83,9 @@ class CliSystem(object):
             "1": self._ref_release_page_manage,
             "2": self._ref_start_uninstall,
             "3": self._github_proxy_set,
+            "4": self._ref_snapshot_manage,
         }
-        num = input(t("cli.wait_press")).split()
+        num = _input(t("cli.wait_press")).split()
         if len(num) >= 1 and num[0] in command_list.keys():
             command_list[num[0]](num[1] if len(num) >= 2 else None)
         else:
@@ -83,16 +94,24 @@ class CliSystem(object):
     def _ref_release_page_manage(self, page: str) -> None:
         """获取ref版本列表"""
         page = int(page) if page else 1
+        if not self._ref_core.loaded:
+            self._log_system.info(t("cli.ref_getting"))
+            try:
+                # 带超时轮询，保证 Windows 下 Ctrl+C 能中断等待
+                while not self._ref_core.wait_loaded(0.5):
+                    pass
+            except KeyboardInterrupt:
+                return
         releases_list = self._ref_core.get_release_list_page(5, page)
         for release in releases_list[::-1]:
             self._log_system.info(
                 t(
                     "cli.ref_info",
-                    name=release[0],
-                    version=release[1],
-                    tag_name=release[2],
-                    time=release[3],
-                    url=release[4],
+                    name=release.name,
+                    version=release.version,
+                    tag_name=release.tag,
+                    time=release.published_at,
+                    url=release.url,
                 )
             )
             self._log_system.info("=" * 80)
@@ -101,18 +120,19 @@ class CliSystem(object):
             "p": self._ref_release_page_manage,
             "i": self._ref_install,
         }
-        if self._config.installed_ref_version:
+        latest = self._ref_core.latest_release()
+        if self._config.installed_ref_version and latest:
             self._log_system.info(
                 t(
                     "cli.ref_installed",
                     version=self._ref_core.extract_version(
                         self._config.installed_ref_version
                     ),
-                    new_version=self._ref_core.get_release_list_page(1, 1)[0][1],
-                    time=self._ref_core.get_release_list_page(1, 1)[0][3],
+                    new_version=latest.version,
+                    time=latest.published_at,
                 )
             )
-        num = input(t("cli.ref_list_wait", page=page, all_pages=all_pages)).split()
+        num = _input(t("cli.ref_list_wait", page=page, all_pages=all_pages)).split()
         if len(num) >= 1 and num[0] in command_list.keys():
             command_list[num[0]](num[1] if len(num) >= 2 else None)
         else:
@@ -120,22 +140,29 @@ class CliSystem(object):
 
     def _ref_install(self, version: str) -> None:
         """安装Ref框架确认步骤"""
-        release = self._ref_core.search_release(version)
+        try:
+            release = self._ref_core.search_release(version)
+        except ValueError:
+            release = None
+        if release is None:
+            self._log_system.warning(t("cli.ref_not_found", version=version))
+            self._ref_release_page_manage("1")
+            return
         self._log_system.info(
             t(
                 "cli.ref_info",
-                name=release[0],
-                version=release[1],
-                tag_name=release[2],
-                time=release[3],
-                url=release[4],
+                name=release.name,
+                version=release.version,
+                tag_name=release.tag,
+                time=release.published_at,
+                url=release.url,
             )
         )
         command_list = {
             "y": self._ref_start_install,
             "n": self._ref_release_page_manage,
         }
-        num = input(t("cli.ref_search_wait")).lower().split()
+        num = _input(t("cli.ref_search_wait")).lower().split()
         if len(num) >= 1 and num[0] in command_list.keys():
             command_list[num[0]](version if len(num) >= 1 and num[0] == "y" else "1")
         else:
@@ -149,7 +176,7 @@ class CliSystem(object):
             self._log_system.error(t("cli.ref_install_error", version=version))
 
     def _ref_start_uninstall(self, _) -> None:
-        num = input(t("cli.ref_uninstall_wait")).lower()
+        num = _input(t("cli.ref_uninstall_wait")).lower()
         if not num or num != "y":
             return
         if self._ref_core.uninstall_ref():
@@ -157,14 +184,46 @@ class CliSystem(object):
         else:
             self._log_system.error(t("cli.ref_uninstall_error"))
 
+    def _ref_snapshot_manage(self, _) -> None:
+        """切换到本地快照中的版本"""
+        snapshots = self._ref_core.list_snapshots()
+        if not snapshots:
+            self._log_system.info(t("cli.ref_snapshot_empty"))
+            return
+        for snapshot in snapshots:
+            self._log_system.info(
+                t(
+                    "cli.ref_snapshot_entry",
+                    version=snapshot["version"],
+                    tag=snapshot["tag"],
+                    size=snapshot["size"] / 1024 / 1024,
+                    time=datetime.datetime.fromtimestamp(
+                        snapshot["last_used"]
+                    ).strftime("%Y-%m-%d %H:%M:%S"),
+                    current=(
+                        t("cli.ref_snapshot_current")
+                        if snapshot["tag"] == self._config.installed_ref_version
+                        else ""
+                    ),
+                )
+            )
+        version = _input(t("cli.ref_snapshot_wait"))
+        if not version or version == "q":
+            return
+        if not version.isdigit():
+            self._log_system.warning(t("cli.unknown_num"))
+            return
+        if not self._ref_core.switch_ref(version):
+            self._log_system.error(t("cli.ref_snapshot_missing", version=version))
+
     def _github_proxy_set(self, _) -> None:
-        num = input(t("cli.github_proxy"))
+        num = _input(t("cli.github_proxy"))
         if not num or num != "y":
             self._config.proxy_mode = False
             self._config.save()
             return
         self._config.proxy_mode = True
-        url = input(t("cli.github_proxy_url", url=self._config.proxy_url))
+        url = _input(t("cli.github_proxy_url", url=self._config.proxy_url))
         if url != "":
             parsed = urlparse(url)
 
@@ -183,7 +242,7 @@ class CliSystem(object):
 
     def _game_manage(self) -> None:
         self._log_system.info(t("cli.game_path_known", path=self._config.game_path))
-        path = input(t("cli.game_menu"))
+        path = _input(t("cli.game_menu"))
         if not path or path == "q":
             return
         code = validate_game_path(path)
@@ -191,7 +250,7 @@ class CliSystem(object):
             self._log_system.info(code["message"])
         else:
             self._log_system.warning(code["message"])
-            num = input(t("cli.game_force_save")).lower()
+            num = _input(t("cli.game_force_save")).lower()
             if not num or num != "y":
                 return
         self._config.game_path = code["normalized_path"]
@@ -203,14 +262,14 @@ class CliSystem(object):
         command_list = {
             "1": self._nexus_api
         }
-        num = input(t("cli.wait_press"))
+        num = _input(t("cli.wait_press"))
         if num in command_list.keys():
             command_list[num]()
         else:
             self._log_system.warning(t("cli.unknown_num"))
 
     def _nexus_api(self) -> None:
-        num = input(t("cli.nexus_api"))
+        num = _input(t("cli.nexus_api"))
         if not num and num == "q":
             return
         self._config.api = num
@@ -222,3 +281,56 @@ class CliSystem(object):
 
     def _mod_manage(self) -> None:
         pass
+
+    def _cache_manage(self) -> None:
+        """下载缓存管理"""
+        self._log_system.info(t("cli.cache_menu"))
+        command_list = {
+            "1": self._cache_show,
+            "2": self._cache_prune,
+        }
+        num = _input(t("cli.wait_press"))
+        if num in command_list.keys():
+            command_list[num]()
+        else:
+            self._log_system.warning(t("cli.unknown_num"))
+
+    def _artifact_cache(self) -> ArtifactCache:
+        return ArtifactCache(self._config.cache_dir, self._config.cache_max_bytes)
+
+    def _cache_show(self) -> None:
+        stats = self._artifact_cache().stats()
+        for entry in stats["entries"]:
+            self._log_system.info(
+                t(
+                    "cli.cache_entry",
+                    keys=", ".join(entry["keys"]),
+                    size=entry["size"] / 1024 / 1024,
+                    time=datetime.datetime.fromtimestamp(entry["last_used"]).strftime(
+                        "%Y-%m-%d %H:%M:%S"
+                    ),
+                    digest=entry["digest"][:12],
+                )
+            )
+        self._log_system.info(
+            t(
+                "cli.cache_summary",
+                count=stats["count"],
+                total=stats["total_bytes"] / 1024 / 1024,
+                max=stats["max_bytes"] / 1024 / 1024,
+            )
+        )
+
+    def _cache_prune(self) -> None:
+        size = _input(t("cli.cache_prune_wait"))
+        if size == "q":
+            return
+        try:
+            max_bytes = int(float(size) * 1024 * 1024) if size else None
+        except ValueError:
+            self._log_system.warning(t("cli.unknown_num"))
+            return
+        removed, freed = self._artifact_cache().prune(max_bytes)
+        self._log_system.info(
+            t("cli.cache_pruned", count=removed, size=freed / 1024 / 1024)
+        )
@@ -0,0 +1,83 @@
+import os
+import time
+import shutil
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PurePosixPath, PureWindowsPath
+from typing import Callable, List, Tuple
+
+from ..i18n import t
+
+BUFFER_SIZE = 1024 * 1024
+
+
+def is_unsafe_path(name: str) -> bool:
+    """成员路径是否为绝对路径、带盘符/UNC 前缀或包含 ".."（同时按 POSIX 和 Windows 规则判断）"""
+    for path in (PurePosixPath(name), PureWindowsPath(name)):
+        if path.is_absolute() or path.drive or path.root or ".." in path.parts:
+            return True
+    return False
+
+
+def member_path(base: Path, rel: str) -> Path:
+    """
+    将ZIP成员的相对路径拼接到 base 下
+
+    :raises ValueError: 路径会落到 base 之外
+    """
+    if not rel or is_unsafe_path(rel):
+        raise ValueError(t("downloader.unsafe_member", path=rel))
+    return base / rel
+
+
+def extract_member(zip_ref: zipfile.ZipFile, info: zipfile.ZipInfo, dst: Path) -> None:
+    """将单个ZIP成员流式写入目标路径（父目录需已存在），并保留其修改时间"""
+    with zip_ref.open(info) as src_file, open(dst, "wb") as dst_file:
+        shutil.copyfileobj(src_file, dst_file, BUFFER_SIZE)
+    mtime = time.mktime(info.date_time + (0, 0, -1))
+    os.utime(dst, (mtime, mtime))
+
+
+def extract_members(
+    zip_ref: zipfile.ZipFile,
+    pairs: List[Tuple[zipfile.ZipInfo, Path]],
+    workers: int = 1,
+) -> None:
+    """
+    并行解压多个ZIP成员
+
+    ZipFile 对底层文件的读取带锁，解压（zlib 会释放 GIL）和写盘可在多个线程间并行
+
+    :param pairs: [(成员, 目标路径)]
+    :param workers: 线程数，1 表示串行，超过CPU核心数时按核心数计
+    """
+    for info, _ in pairs:
+        if is_unsafe_path(info.filename):
+            raise ValueError(t("downloader.unsafe_member", path=info.filename))
+    _run(
+        [
+            (lambda info=info, dst=dst: extract_member(zip_ref, info, dst))
+            for info, dst in pairs
+        ],
+        [dst for _, dst in pairs],
+        workers,
+    )
+
+
+def _run(tasks: List[Callable[[], None]], targets: List[Path], workers: int) -> None:
+    """预先创建全部父目录，再用有界线程池执行逐文件任务"""
+    for parent in sorted({dst.parent for dst in targets}):
+        parent.mkdir(parents=True, exist_ok=True)
+
+    # 单核上多线程只增加切换开销
+    workers = min(workers, os.cpu_count() or 1)
+    if workers <= 1 or len(tasks) <= 1:
+        for task in tasks:
+            task()
+        return
+
+    with ThreadPoolExecutor(
+        max_workers=min(workers, len(tasks)), thread_name_prefix="Copy"
+    ) as executor:
+        # list() 取回全部结果，任一任务异常会在此抛出
+        list(executor.map(lambda task: task(), tasks))
@@ -1,40 +1,272 @@
 import os
+import json
+import time
+import hashlib
 import shutil
 import requests
+import zlib
 import zipfile
 import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 from urllib.parse import urlparse
 from pathlib import Path
-from typing import List, Dict, Union
+from typing import Callable, List, Dict, Optional, Tuple, Union
 
 
 from ..context import GlobalContext
 from ..i18n import t
+from .artifact_cache import ArtifactCache
+from .cleanup_scanner import iter_matches
+from .copy_engine import extract_members, member_path
+from .download_scheduler import DownloadJob, get_scheduler
+from .mirror_selector import MirrorSelector
+from .http_client import DEFAULT_TIMEOUT, get_session, get_connection_stats
 
 
-def download_with_progress(url: str, save_path: str) -> None:
+CHUNK_SIZE = 8192
+STAGING_PREFIX = ".mhwmm_staging_"  # 游戏目录内暂存区的名称前缀
+STAGING_JOURNAL = "journal.json"
+STATE_SAVE_INTERVAL = 1.0  # 断点状态文件最短写入间隔（秒）
+
+
+class ValidatorChangedError(IOError):
+    """远端文件校验标识（ETag/Last-Modified）已变化，断点数据失效"""
+
+
+class PartialState:
+    """断点续传状态，以 JSON 形式保存在 .part 文件旁"""
+
+    def __init__(
+        self,
+        path: str,
+        url: str,
+        size: int,
+        etag: str = "",
+        last_modified: str = "",
+        completed: List[List[int]] = None,
+    ):
+        self.path = path
+        self.url = url
+        self.size = size
+        self.etag = etag
+        self.last_modified = last_modified
+        self.completed = completed or []  # 已完成的闭区间 [[start, end], ...]
+        self._lock = threading.Lock()
+        self._last_save = 0.0
+
+    @classmethod
+    def load(cls, path: str) -> Optional["PartialState"]:
+        """读取状态文件，不存在或损坏时返回 None"""
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                path,
+                data["url"],
+                data["size"],
+                data.get("etag", ""),
+                data.get("last_modified", ""),
+                data.get("completed", []),
+            )
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    def matches(self, url: str, size: int, etag: str, last_modified: str) -> bool:
+        """远端文件与记录一致时才允许续传"""
+        if not (etag or last_modified):
+            return False
+        return (
+            self.url == url
+            and self.size == size
+            and self.etag == etag
+            and self.last_modified == last_modified
+        )
+
+    @property
+    def validator(self) -> str:
+        """If-Range 使用的校验值（弱 ETag 不可用于 If-Range）"""
+        if self.etag and not self.etag.startswith("W/"):
+            return self.etag
+        return self.last_modified
+
+    @property
+    def completed_bytes(self) -> int:
+        return sum(end - start + 1 for start, end in self.completed)
+
+    def missing_ranges(self) -> List[Tuple[int, int]]:
+        """返回尚未下载的闭区间"""
+        gaps = []
+        pos = 0
+        for start, end in self.completed:
+            if start > pos:
+                gaps.append((pos, start - 1))
+            pos = max(pos, end + 1)
+        if pos < self.size:
+            gaps.append((pos, self.size - 1))
+        return gaps
+
+    def add(self, start: int, end: int) -> None:
+        """记录已完成区间，并按间隔写盘"""
+        with self._lock:
+            merged = []
+            for item in sorted(self.completed + [[start, end]]):
+                if merged and item[0] <= merged[-1][1] + 1:
+                    merged[-1][1] = max(merged[-1][1], item[1])
+                else:
+                    merged.append(list(item))
+            self.completed = merged
+            if time.monotonic() - self._last_save >= STATE_SAVE_INTERVAL:
+                self._save_locked()
+
+    def save(self) -> None:
+        with self._lock:
+            self._save_locked()
+
+    def _save_locked(self) -> None:
+        data = {
+            "url": self.url,
+            "size": self.size,
+            "etag": self.etag,
+            "last_modified": self.last_modified,
+            "completed": self.completed,
+        }
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        self._last_save = time.monotonic()
+
+
+class StreamHasher:
+    """
+    边下载边计算摘要
+
+    按顺序到达的数据直接送入哈希；分段下载中先于前沿到达的数据已写入文件，
+    待其与前沿连续后再从文件（通常仍在页缓存中）补读
+    """
+
+    def __init__(self, path: str, algorithms: Tuple[str, ...] = ("sha256",)):
+        self.path = path
+        self.offset = 0  # 已计入摘要的字节数
+        self._hashes = {name: hashlib.new(name) for name in algorithms}
+        self._lock = threading.Lock()
+
+    def update(self, start: int, data: bytes) -> None:
+        """数据恰好位于前沿时直接计入，否则留待 catch_up 补读"""
+        with self._lock:
+            if start == self.offset:
+                self._feed(data)
+
+    def catch_up(self, completed: List[List[int]]) -> None:
+        """从文件补读与前沿相连的已完成区间"""
+        with self._lock:
+            for start, end in completed:
+                if start <= self.offset <= end:
+                    with open(self.path, "rb") as f:
+                        f.seek(self.offset)
+                        remaining = end + 1 - self.offset
+                        while remaining > 0:
+                            block = f.read(min(remaining, 1024 * 1024))
+                            if not block:
+                                break
+                            self._feed(block)
+                            remaining -= len(block)
+
+    def hexdigests(self) -> Dict[str, str]:
+        with self._lock:
+            return {name: h.hexdigest() for name, h in self._hashes.items()}
+
+    def _feed(self, data: bytes) -> None:
+        for h in self._hashes.values():
+            h.update(data)
+        self.offset += len(data)
+
+
+def parse_checksum(checksum: str) -> Tuple[str, str]:
+    """解析 "sha256:<hex>" 形式的校验值，未写算法时按 sha256 处理"""
+    algorithm, _, value = checksum.strip().rpartition(":")
+    return (algorithm or "sha256").lower(), value.lower()
+
+
+def download_with_progress(
+    url: str,
+    save_path: str,
+    segments: int = 1,
+    min_segment_size: int = 4 * 1024 * 1024,
+    expected_size: int = None,
+    checksum: str = None,
+    algorithms: Tuple[str, ...] = ("sha256",),
+    tick: Callable[[int], None] = None,
+    resume_key: str = None,
+    stall_timeout: float = None,
+) -> Dict[str, str]:
     """
     带进度条的文件下载函数
 
+    下载过程写入 save_path.part，并在旁边的 .part.json 中记录 URL、ETag/Last-Modified
+    及已完成的字节区间；再次调用时若远端校验标识未变，则通过 Range/If-Range 续传。
+    服务器声明支持 Accept-Ranges 时按字节区间分段并发下载，否则退回单连接流式下载。
+    摘要在下载过程中同步计算，校验失败时删除文件并抛出 IOError
+
     :param url: 下载链接
     :param save_path: 本地保存路径
+    :param segments: 最大分段数（并发连接数），1 表示不分段
+    :param min_segment_size: 每段最小字节数，文件过小时自动减少分段
+    :param expected_size: 预期文件大小（如 GitHub Release 资源的 size）
+    :param checksum: 预期摘要，格式 "sha256:<hex>"
+    :param algorithms: 需要计算的摘要算法
+    :param tick: 每写入一个数据块后以字节数调用，用于限速、计量和取消（见 DownloadScheduler）
+    :param resume_key: 断点记录使用的标识，默认为 url；经不同镜像下载同一文件时传入原始地址
+    :param stall_timeout: 超过该秒数未收到数据即视为停滞并抛出超时异常
+    :return: {算法: 十六进制摘要}
     """
     # 确保目录存在
     os.makedirs(os.path.dirname(save_path), exist_ok=True)
+    tick = tick or (lambda amount: None)
+    resume_key = resume_key or url
+    timeout = (DEFAULT_TIMEOUT[0], stall_timeout) if stall_timeout else None
+    part_path = save_path + ".part"
+    state_path = part_path + ".json"
 
-    # 发送HEAD请求获取文件大小
-    with requests.head(url, allow_redirects=True) as response:
+    # 直接以 Range: bytes=0- 发起 GET：206 表示支持分段，同时从响应头取得大小和校验标识，
+    # 省去单独的 HEAD 往返；该响应可继续用作第一段的数据流
+    session = get_session()
+    response = session.get(
+        url, headers={"Range": "bytes=0-"}, stream=True, timeout=timeout
+    )
+    try:
         response.raise_for_status()
-        file_size = int(response.headers.get("Content-Length", 0))
+        file_size = _total_size(response)
+        ranged = response.status_code == 206 and file_size > 0
+        etag = response.headers.get("ETag", "")
+        last_modified = response.headers.get("Last-Modified", "")
+        final_url = response.url  # 跟随重定向后的真实地址
+
+        # 大小与发布信息不符时无需下载即可判定失败
+        if expected_size and file_size and expected_size != file_size:
+            raise IOError(t("downloader.download_vail_fail"))
 
-    # 流式下载
-    with requests.get(url, stream=True) as r:
-        r.raise_for_status()
+        state = PartialState.load(state_path) if ranged else None
+        if not (
+            state
+            and state.matches(resume_key, file_size, etag, last_modified)
+            and os.path.exists(part_path)
+            and os.path.getsize(part_path) == file_size
+        ):
+            # 无可用断点或远端文件已变化，丢弃旧数据
+            _discard_partial(part_path, state_path)
+            state = PartialState(
+                state_path, resume_key, file_size, etag, last_modified
+            )
+
+        if checksum:
+            algorithms = tuple(set(algorithms) | {parse_checksum(checksum)[0]})
+        hasher = StreamHasher(part_path, algorithms)
 
         # 初始化进度条
         progress = tqdm(
             total=file_size,
+            initial=state.completed_bytes,
             unit="B",
             unit_scale=True,
             unit_divisor=1024,
@@ -42,31 +274,236 @@ def download_with_progress(url: str, save_path: str) -> None:
             ncols=100,  # 进度条宽度
         )
 
-        with open(save_path, "wb") as f:
-            for chunk in r.iter_content(chunk_size=8192):
-                if chunk:  # 过滤保持连接的空白块
-                    f.write(chunk)
-                    progress.update(len(chunk))
-
-        progress.close()
+        try:
+            if ranged:
+                try:
+                    _download_ranges(
+                        final_url,
+                        part_path,
+                        state,
+                        segments,
+                        min_segment_size,
+                        progress,
+                        hasher,
+                        tick,
+                        timeout,
+                        response,
+                    )
+                    # 续传时已有的数据及未能顺序计入的分段在此补读
+                    hasher.catch_up(state.completed)
+                except ValidatorChangedError:
+                    # 下载期间远端文件被替换，从头重新下载
+                    _discard_partial(part_path, state_path)
+                    progress.reset()
+                    hasher = StreamHasher(part_path, algorithms)
+                    with session.get(url, stream=True, timeout=timeout) as r:
+                        r.raise_for_status()
+                        _download_single(r, part_path, progress, hasher, tick)
+            else:
+                _download_single(response, part_path, progress, hasher, tick)
+        finally:
+            progress.close()
+    finally:
+        response.close()
 
     # 验证下载完整性
-    if file_size > 0 and os.path.getsize(save_path) != file_size:
-        os.remove(save_path)
+    actual_size = os.path.getsize(part_path)
+    if (file_size > 0 and actual_size != file_size) or (
+        expected_size and actual_size != expected_size
+    ):
+        _discard_partial(part_path, state_path)
         raise IOError(t("downloader.download_vail_fail"))
 
+    digests = hasher.hexdigests()
+    if checksum:
+        algorithm, value = parse_checksum(checksum)
+        if digests[algorithm] != value:
+            _discard_partial(part_path, state_path)
+            raise IOError(
+                t(
+                    "downloader.checksum_mismatch",
+                    expected=value,
+                    actual=digests[algorithm],
+                )
+            )
+
+    os.replace(part_path, save_path)
+    if os.path.exists(state_path):
+        os.remove(state_path)
+    return digests
+
+
+def _total_size(response: requests.Response) -> int:
+    """从 Content-Range（206）或 Content-Length（200）中取得文件总大小"""
+    if response.status_code == 206:
+        total = response.headers.get("Content-Range", "").rpartition("/")[2]
+        return int(total) if total.isdigit() else 0
+    return int(response.headers.get("Content-Length", 0))
+
+
+def _discard_partial(part_path: str, state_path: str) -> None:
+    """删除断点数据"""
+    for path in (part_path, state_path):
+        if os.path.exists(path):
+            os.remove(path)
+
+
+def _split_ranges(
+    gaps: List[Tuple[int, int]], segments: int, min_segment_size: int
+) -> List[Tuple[int, int]]:
+    """将待下载区间切分为不超过 segments 个、每段不小于 min_segment_size 的闭区间"""
+    total = sum(end - start + 1 for start, end in gaps)
+    if total <= 0:
+        return []
+    count = max(1, min(segments, total // max(1, min_segment_size)))
+    step = -(-total // count)  # 向上取整
+    ranges = []
+    for gap_start, gap_end in gaps:
+        for start in range(gap_start, gap_end + 1, step):
+            ranges.append((start, min(start + step - 1, gap_end)))
+    return ranges
+
+
+def _download_single(
+    response: requests.Response,
+    save_path: str,
+    progress: tqdm,
+    hasher: StreamHasher,
+    tick: Callable[[int], None],
+) -> None:
+    """单连接流式下载"""
+    with open(save_path, "wb") as f:
+        for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+            if chunk:  # 过滤保持连接的空白块
+                f.write(chunk)
+                hasher.update(hasher.offset, chunk)
+                progress.update(len(chunk))
+                tick(len(chunk))
+
+
+def _download_ranges(
+    url: str,
+    part_path: str,
+    state: PartialState,
+    segments: int,
+    min_segment_size: int,
+    progress: tqdm,
+    hasher: StreamHasher,
+    tick: Callable[[int], None],
+    timeout: Tuple[float, float] = None,
+    first_response: requests.Response = None,
+) -> None:
+    """
+    按区间下载缺失部分，各段写入预分配文件的对应偏移
+
+    first_response 为从 0 字节开始的已打开响应，第一段从 0 开始时直接复用
+    """
+    ranges = _split_ranges(state.missing_ranges(), segments, min_segment_size)
+    if not ranges:
+        return
+    if ranges[0][0] != 0:
+        first_response = None
+
+    # 预分配文件
+    if not os.path.exists(part_path):
+        with open(part_path, "wb") as f:
+            f.truncate(state.size)
+    state.save()
+
+    lock = threading.Lock()
+    failed = threading.Event()  # 任一分段失败时通知其余分段尽快停止
+    validator = state.validator
+
+    def fetch(start: int, end: int, response: requests.Response = None) -> None:
+        if response is None:
+            headers = {"Range": f"bytes={start}-{end}"}
+            if validator:
+                headers["If-Range"] = validator
+            response = get_session().get(
+                url, headers=headers, stream=True, timeout=timeout
+            )
+        with response as r:
+            r.raise_for_status()
+            if r.status_code != 206:
+                if validator:
+                    raise ValidatorChangedError(t("downloader.validator_changed"))
+                raise IOError(t("downloader.range_not_supported"))
+            # 每个线程独立句柄，seek 后写入即为定位写
+            with open(part_path, "r+b") as f:
+                f.seek(start)
+                pos = start  # 当前已写入位置
+                flushed = start  # 已记录到状态中的位置
+                try:
+                    for chunk in r.iter_content(chunk_size=CHUNK_SIZE):
+                        if failed.is_set():
+                            break
+                        if chunk:
+                            data = chunk[: end + 1 - pos]
+                            f.write(data)
+                            hasher.update(pos, data)
+                            pos += len(data)
+                            with lock:
+                                progress.update(len(data))
+                            tick(len(data))
+                            if pos - flushed >= min_segment_size // 4 or pos > end:
+                                f.flush()
+                                state.add(flushed, pos - 1)
+                                hasher.catch_up(state.completed)
+                                flushed = pos
+                            if pos > end:
+                                break
+                finally:
+                    if pos > flushed:
+                        f.flush()
+                        state.add(flushed, pos - 1)
+        if pos != end + 1:
+            raise IOError(t("downloader.download_vail_fail"))
+
+    try:
+        with ThreadPoolExecutor(
+            max_workers=len(ranges), thread_name_prefix="Download"
+        ) as executor:
+            futures = [
+                executor.submit(fetch, start, end, first_response if i == 0 else None)
+                for i, (start, end) in enumerate(ranges)
+            ]
+            try:
+                for future in as_completed(futures):
+                    future.result()
+            except BaseException:
+                failed.set()
+                raise
+    finally:
+        # 无论成功与否都保存进度，供下次续传
+        state.save()
+
 
 class FileUpdater:
     def __init__(self):
         self._config = GlobalContext.get_config()
         self.logger = GlobalContext.get_logger()
+        self._artifact_cache = ArtifactCache(
+            self._config.cache_dir, self._config.cache_max_bytes
+        )
+        self._mirror_selector = MirrorSelector(
+            os.path.join(self._config.cache_dir, "mirrors.json"),
+            self._config.mirror_ttl,
+        )
+        self._scheduler = get_scheduler()
+        self._scheduler.configure(
+            self._config.download_parallel, self._config.bandwidth_limit
+        )
 
     def install_from_zip(
         self,
         url: str,
         copy_rules: List[Dict[str, Union[str, bool]]],
         cleanup_patterns: List[str] = None,
-    ) -> None:
+        cache_keys: List[str] = None,
+        checksum: str = None,
+        expected_size: int = None,
+        mirrors: List[str] = None,
+    ) -> str:
         """
         通用安装方法
 
@@ -76,132 +513,635 @@ class FileUpdater:
                 'src': '源相对路径',
                 'dst': '目标相对路径',
                 'overwrite': True/False,  # 可选，默认True
-                'type': 'file/dir'  # 可选，自动检测
+                'type': 'file/dir',  # 可选，自动检测
+                'delta': True/False  # 可选，目录是否增量同步，默认取配置 delta_sync
             }
         ]
         :param cleanup_patterns: 清理模式列表 ["*.tmp"]
+        :param cache_keys: 额外的缓存索引键（如版本标签），命中缓存时不再下载
+        :param checksum: 安装包的预期摘要（"sha256:<hex>"），校验失败时不会开始解压
+        :param expected_size: 安装包的预期大小
+        :param mirrors: 候选镜像前缀（"" 为直连，代理为 前缀 + url），默认直连
+        :return: 安装包的 sha256
         """
-        with tempfile.TemporaryDirectory() as tmp_dir:
-            try:
-                zip_path = self._download_file(url, tmp_dir)
-                extract_dir = self._extract_zip(zip_path, tmp_dir)
-                self._copy_assets(extract_dir, copy_rules)
-                self._cleanup_files(cleanup_patterns or [])
+        cache_keys = [url] + (cache_keys or [])
+        try:
+            zip_path, digest = self._fetch_artifact(
+                url, cache_keys, checksum, expected_size, mirrors
+            )
+            self._install_artifact(zip_path, copy_rules, cleanup_patterns)
+            return digest
+        except Exception as e:
+            self.logger.error(t("downloader.install_failed", error=str(e)))
+            raise
+
+    def install_many(self, items: List[Dict]) -> Dict[str, Union[str, Exception]]:
+        """
+        批量安装：下载交给调度器并发执行（受并发数和带宽上限约束），
+        每个下载完成后立即在当前线程串行安装
+
+        :param items: [
+            {
+                'url': 下载地址,
+                'copy_rules': 复制规则（同 install_from_zip）,
+                'cleanup_patterns' / 'cache_keys' / 'checksum' / 'expected_size' /
+                'mirrors': 可选，同 install_from_zip，
+                'priority': 可选，数值越小越先下载，默认 0
+            }
+        ]
+        :return: {url: 安装包 sha256 或失败时的异常}
+        """
+        results: Dict[str, Union[str, Exception]] = {}
+        jobs: Dict[DownloadJob, Dict] = {}
+        # 调度器的统计覆盖整个进程，本批次只统计自身任务的字节数和期间的活动时间
+        started = self._scheduler.stats()
 
-                self.logger.info(t("downloader.install_success"))
+        def install(item: Dict, zip_path: str, digest: str) -> None:
+            try:
+                self._install_artifact(
+                    zip_path, item["copy_rules"], item.get("cleanup_patterns")
+                )
+                results[item["url"]] = digest
             except Exception as e:
                 self.logger.error(t("downloader.install_failed", error=str(e)))
-                raise
+                results[item["url"]] = e
+
+        try:
+            ready = []
+            for item in items:
+                cache_keys = [item["url"]] + item.get("cache_keys", [])
+                cached = self._lookup_cache(cache_keys, item.get("checksum"))
+                if cached:
+                    ready.append((item, cached))
+                else:
+                    job = self._submit_download(
+                        item["url"],
+                        item.get("checksum"),
+                        item.get("expected_size"),
+                        item.get("priority", 0),
+                        item.get("mirrors"),
+                    )
+                    jobs[job] = item
+
+            for item, (zip_path, digest) in ready:
+                install(item, zip_path, digest)
+
+            for job in self._scheduler.as_completed(list(jobs)):
+                item = jobs[job]
+                try:
+                    zip_path, digests = self._finish_download(job, item["url"])
+                    zip_path = self._store_download(
+                        zip_path, digests, [item["url"]] + item.get("cache_keys", [])
+                    )
+                except Exception as e:
+                    results[item["url"]] = e
+                    continue
+                install(item, zip_path, digests["sha256"])
+        except KeyboardInterrupt:
+            for job in jobs:
+                job.cancel()
+            raise
+
+        size = sum(job.bytes for job in jobs)
+        elapsed = self._scheduler.stats()["elapsed"] - started["elapsed"]
+        self.logger.info(
+            t(
+                "downloader.batch_finished",
+                count=len(items),
+                failed=sum(isinstance(r, Exception) for r in results.values()),
+                size=size / 1024 / 1024,
+                speed=(size / elapsed if elapsed else 0.0) / 1024 / 1024,
+            )
+        )
+        return results
+
+    def _install_artifact(
+        self,
+        zip_path: str,
+        copy_rules: List[Dict[str, Union[str, bool]]],
+        cleanup_patterns: List[str] = None,
+    ) -> None:
+        """从本地安装包执行安装"""
+        try:
+            self._install_zip(zip_path, copy_rules)
+        except RuntimeError:
+            # 缓存文件损坏时移出缓存，下次重新下载
+            if self._artifact_cache.enabled:
+                self._artifact_cache.discard(zip_path)
+            raise
+        finally:
+            # 未启用缓存时下载文件不再需要，未完成的 .part 保留供下次续传
+            if not self._artifact_cache.enabled and os.path.exists(zip_path):
+                os.remove(zip_path)
+        self._cleanup_files(cleanup_patterns or [])
+
+        self.logger.info(t("downloader.install_success"))
 
-    def _download_file(self, url: str, save_dir: str) -> str:
-        """文件下载方法"""
+    def _fetch_artifact(
+        self,
+        url: str,
+        cache_keys: List[str],
+        checksum: str = None,
+        expected_size: int = None,
+        mirrors: List[str] = None,
+    ) -> Tuple[str, str]:
+        """优先从缓存取得安装包，未命中时下载并存入缓存，返回 (路径, sha256)"""
+        cached = self._lookup_cache(cache_keys, checksum)
+        if cached:
+            return cached
+
+        zip_path, digests = self._download_file(url, checksum, expected_size, mirrors)
+        return self._store_download(zip_path, digests, cache_keys), digests["sha256"]
+
+    def _lookup_cache(
+        self, cache_keys: List[str], checksum: str = None
+    ) -> Optional[Tuple[str, str]]:
+        """查找缓存，命中时返回 (路径, sha256)"""
+        if not self._artifact_cache.enabled:
+            return None
+        cached = self._artifact_cache.lookup(*cache_keys)
+        if not cached:
+            return None
+        # 缓存按 sha256 寻址，文件名即摘要，可直接与预期值比较
+        digest = os.path.basename(cached)
+        if checksum:
+            algorithm, value = parse_checksum(checksum)
+            if algorithm == "sha256" and value != digest:
+                return None
+        self.logger.info(t("downloader.cache_hit", path=cached))
+        return cached, digest
+
+    def _store_download(
+        self, zip_path: str, digests: Dict[str, str], cache_keys: List[str]
+    ) -> str:
+        """将下载完成的文件存入缓存（已启用时），返回最终路径"""
+        if self._artifact_cache.enabled:
+            return self._artifact_cache.store(
+                zip_path, cache_keys, digest=digests["sha256"]
+            )
+        return zip_path
+
+    def _download_file(
+        self,
+        url: str,
+        checksum: str = None,
+        expected_size: int = None,
+        mirrors: List[str] = None,
+    ) -> Tuple[str, Dict[str, str]]:
+        """文件下载方法，下载到持久目录以便中断后续传，返回 (路径, 摘要)"""
+        job = self._submit_download(url, checksum, expected_size, mirrors=mirrors)
+        return self._finish_download(job, url)
+
+    def _submit_download(
+        self,
+        url: str,
+        checksum: str = None,
+        expected_size: int = None,
+        priority: int = 0,
+        mirrors: List[str] = None,
+    ) -> DownloadJob:
+        """
+        将下载提交到全局调度器
+
+        有多个镜像时按测速排序依次尝试，当前镜像出错或停滞则切换到下一个，
+        断点记录以原始地址为标识，切换后可继续续传
+        """
         self.logger.info(t("downloader.download_start", url=url))
+        file_name = hashlib.sha1(url.encode("utf-8")).hexdigest()[:16] + ".zip"
+        local_path = os.path.join(self._config.download_dir, file_name)
+        mirrors = mirrors or [""]
+
+        def run(tick: Callable[[int], None]) -> Tuple[str, Dict[str, str]]:
+            candidates = self._rank_mirrors(url, mirrors)
+            for index, mirror in enumerate(candidates):
+                try:
+                    digests = download_with_progress(
+                        mirror + url,
+                        local_path,
+                        segments=self._config.download_segments,
+                        min_segment_size=self._config.download_min_segment_size,
+                        expected_size=expected_size,
+                        checksum=checksum,
+                        tick=tick,
+                        resume_key=url,
+                        stall_timeout=self._config.stall_timeout,
+                    )
+                    return local_path, digests
+                except requests.exceptions.RequestException as e:
+                    if index + 1 == len(candidates):
+                        raise
+                    self.logger.warning(
+                        t(
+                            "downloader.mirror_switch",
+                            mirror=mirror or t("downloader.mirror_direct"),
+                            error=str(e),
+                        )
+                    )
+                    self._mirror_selector.demote(url, mirrors, mirror)
+
+        return self._scheduler.submit(url, run, priority)
+
+    def _rank_mirrors(self, url: str, mirrors: List[str]) -> List[str]:
+        """启用镜像测速时按速度排序候选镜像，否则保持原顺序"""
+        if len(mirrors) <= 1 or not self._config.mirror_racing:
+            return mirrors
+        ranked = self._mirror_selector.rank(url, mirrors)
+        self.logger.info(
+            t(
+                "downloader.mirror_selected",
+                mirror=ranked[0] or t("downloader.mirror_direct"),
+            )
+        )
+        return ranked
+
+    def _finish_download(
+        self, job: DownloadJob, url: str
+    ) -> Tuple[str, Dict[str, str]]:
+        """等待下载任务结束，返回 (路径, 摘要)"""
         try:
-            local_path = os.path.join(save_dir, "download.zip")
-            download_with_progress(url, local_path)
+            local_path, digests = job.result()
             self.logger.info(t("downloader.download_success"))
-            return local_path
+            self.logger.debug(t("downloader.download_digest", digest=digests["sha256"]))
+            for host, stat in get_connection_stats().items():
+                self.logger.debug(t("downloader.connection_stats", host=host, **stat))
+            return local_path, digests
         except requests.exceptions.RequestException as e:
             self.logger.error(t("downloader.download_failed", error=str(e)))
             raise RuntimeError(t("downloader.download_failed_short"))
 
-    def _extract_zip(self, zip_path: str, extract_dir: str) -> str:
-        """解压ZIP文件"""
+    def _install_zip(
+        self, zip_path: str, rules: List[Dict[str, Union[str, bool]]]
+    ) -> None:
+        """
+        读取ZIP中央目录，仅将复制规则命中的成员流式解压到游戏目录
+
+        成员先解压到游戏目录内的暂存区（与目标位于同一文件系统），全部成功后
+        再逐项以重命名替换目标，旧文件移入暂存区备份，任一步失败则回滚
+        """
         self.logger.info(t("downloader.unzip_start", path=zip_path))
+        game_root = Path(self._config.game_path)
+        self._recover_staging(game_root)
+        staging = Path(tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=game_root))
         try:
-            extract_folder = os.path.join(extract_dir, "extracted")
-            os.makedirs(extract_folder, exist_ok=True)
-
-            with zipfile.ZipFile(zip_path, "r") as zip_ref:
-                zip_ref.extractall(extract_folder)
-
-            self.logger.info(t("downloader.unzip_success"))
-            return extract_folder
-
-        except zipfile.BadZipFile as e:
-            self.logger.error(t("downloader.unzip_fail"))
-            raise RuntimeError(t("downloader.invalid_zip"))
+            try:
+                with zipfile.ZipFile(zip_path, "r") as zip_ref:
+                    targets = self._copy_assets(zip_ref, rules, staging)
+                self.logger.info(t("downloader.unzip_success"))
+            except zipfile.BadZipFile:
+                self.logger.error(t("downloader.unzip_fail"))
+                raise RuntimeError(t("downloader.invalid_zip"))
+            self._commit_staged(targets, staging)
+            self._prune_empty_dirs(
+                [dst for staged, dst in targets if staged is None], game_root
+            )
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
 
     def _copy_assets(
-        self, extract_dir: str, rules: List[Dict[str, Union[str, bool]]]
-    ) -> None:
-        """通用资源复制方法"""
+        self,
+        zip_ref: zipfile.ZipFile,
+        rules: List[Dict[str, Union[str, bool]]],
+        staging: Path,
+    ) -> List[Tuple[Optional[Path], Path]]:
+        """
+        通用资源复制方法，将规则命中的成员写入暂存区
+
+        :return: [(暂存路径, 目标路径)]，暂存路径为 None 表示删除目标
+        """
         game_root = Path(self._config.game_path)
-        src_root = Path(extract_dir)
+        members = {
+            info.filename: info for info in zip_ref.infolist() if not info.is_dir()
+        }
+        targets = []
 
-        for rule in rules:
+        for index, rule in enumerate(rules):
+            src = rule["src"].replace("\\", "/").strip("/")
+            dst_path = game_root / rule["dst"]
+            # 每条规则独立的暂存位置，避免目标路径嵌套时互相影响
+            staged_path = staging / str(index)
             try:
-                src_path = src_root / rule["src"]
-                dst_path = game_root / rule["dst"]
-
-                # 自动检测类型
-                is_dir = rule.get("type") == "dir" or src_path.is_dir()
+                # 自动检测类型：成员中不存在同名文件时按目录前缀处理
+                is_dir = rule.get("type") == "dir" or (
+                    rule.get("type") != "file" and src not in members
+                )
                 overwrite = rule.get("overwrite", True)
 
                 if is_dir:
-                    self._copy_directory(src_path, dst_path, overwrite)
+                    prefix = f"{src}/" if src else ""
+                    matched = [
+                        info
+                        for name, info in members.items()
+                        if name.startswith(prefix)
+                    ]
+                    if not matched:
+                        raise FileNotFoundError(
+                            t("downloader.source_missing", path=src)
+                        )
+                    targets.extend(
+                        self._copy_directory(
+                            zip_ref,
+                            matched,
+                            prefix,
+                            staged_path,
+                            dst_path,
+                            overwrite,
+                            rule.get("delta", self._config.delta_sync),
+                        )
+                    )
                 else:
-                    self._copy_single_file(src_path, dst_path, overwrite)
+                    if src not in members:
+                        raise FileNotFoundError(
+                            t("downloader.source_missing", path=src)
+                        )
+                    targets.extend(
+                        self._copy_single_file(
+                            zip_ref, members[src], staged_path, dst_path, overwrite
+                        )
+                    )
 
             except Exception as e:
                 self.logger.error(
                     t(
                         "downloader.copy_error",
-                        src=str(src_path),
+                        src=src,
                         dst=str(dst_path),
                         error=str(e),
                     )
                 )
                 raise
+        return targets
 
-    def _copy_directory(self, src: Path, dst: Path, overwrite: bool) -> None:
-        """复制目录"""
+    def _copy_directory(
+        self,
+        zip_ref: zipfile.ZipFile,
+        members: List[zipfile.ZipInfo],
+        prefix: str,
+        staged: Path,
+        dst: Path,
+        overwrite: bool,
+        delta: bool = False,
+    ) -> List[Tuple[Optional[Path], Path]]:
+        """复制目录（所有以 prefix 开头的成员）到暂存区"""
         if dst.exists():
-            if overwrite:
-                self.logger.debug(t("downloader.overwriting_dir", path=str(dst)))
-                shutil.rmtree(dst)
-            else:
+            if not overwrite:
                 self.logger.debug(t("downloader.skipping_dir", path=str(dst)))
-                return
+                return []
+            if delta and dst.is_dir():
+                return self._sync_directory(zip_ref, members, prefix, staged, dst)
+            self.logger.debug(t("downloader.overwriting_dir", path=str(dst)))
+
+        extract_members(
+            zip_ref,
+            [
+                (info, member_path(staged, info.filename[len(prefix) :]))
+                for info in members
+            ],
+            self._config.copy_workers,
+        )
+        self.logger.info(t("downloader.copied_dir", src=prefix, dst=str(dst)))
+        return [(staged, dst)]
+
+    def _sync_directory(
+        self,
+        zip_ref: zipfile.ZipFile,
+        members: List[zipfile.ZipInfo],
+        prefix: str,
+        staged: Path,
+        dst: Path,
+    ) -> List[Tuple[Optional[Path], Path]]:
+        """
+        增量同步目录：仅暂存新增或变化的文件，并删除新版本中已不存在的文件
+
+        先比较大小，大小相同时再比较 CRC32（ZIP 中央目录自带）
+        """
+        targets = []
+        pending = []
+        written = skipped = 0
+        wanted = set()
+
+        for info in members:
+            rel = info.filename[len(prefix) :]
+            target = member_path(dst, rel)
+            wanted.add(Path(rel))
+            if self._is_unchanged(info, target):
+                skipped += info.file_size
+                continue
+            staged_file = member_path(staged, rel)
+            pending.append((info, staged_file))
+            targets.append((staged_file, target))
+            written += info.file_size
+            self.logger.debug(
+                t("downloader.copied_file", src=info.filename, dst=str(target))
+            )
+        extract_members(zip_ref, pending, self._config.copy_workers)
+
+        removed = 0
+        for root, _, files in os.walk(dst):
+            for name in files:
+                path = Path(root) / name
+                if path.relative_to(dst) not in wanted:
+                    targets.append((None, path))
+                    removed += 1
+
+        self.logger.info(
+            t(
+                "downloader.delta_summary",
+                dst=str(dst),
+                changed=len(targets) - removed,
+                removed=removed,
+                written=written,
+                skipped=skipped,
+            )
+        )
+        return targets
 
-        shutil.copytree(src, dst)
-        self.logger.info(t("downloader.copied_dir", src=str(src), dst=str(dst)))
+    @staticmethod
+    def _is_unchanged(info: zipfile.ZipInfo, target: Path) -> bool:
+        """
+        判断目标文件是否与ZIP成员一致
 
-    def _copy_single_file(self, src: Path, dst: Path, overwrite: bool) -> None:
-        """复制单个文件"""
-        if not src.exists():
-            raise FileNotFoundError(t("downloader.source_missing", path=str(src)))
+        不以修改时间作为依据：解压时会写入ZIP中的时间，固定时间戳打包的不同版本之间
+        时间相同而内容不同
+        """
+        try:
+            stat = target.stat()
+        except OSError:
+            return False
+        if stat.st_size != info.file_size:
+            return False
+        crc = 0
+        with open(target, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                crc = zlib.crc32(block, crc)
+        return crc == info.CRC
 
+    def _copy_single_file(
+        self,
+        zip_ref: zipfile.ZipFile,
+        info: zipfile.ZipInfo,
+        staged: Path,
+        dst: Path,
+        overwrite: bool,
+    ) -> List[Tuple[Optional[Path], Path]]:
+        """复制单个文件到暂存区"""
         if dst.exists():
             if overwrite:
                 self.logger.debug(t("downloader.overwriting_file", path=str(dst)))
-                dst.unlink()
             else:
                 self.logger.debug(t("downloader.skipping_file", path=str(dst)))
-                return
+                return []
 
-        dst.parent.mkdir(parents=True, exist_ok=True)
-        shutil.copy2(src, dst)
-        self.logger.info(t("downloader.copied_file", src=str(src), dst=str(dst)))
+        extract_members(zip_ref, [(info, staged)])
+        self.logger.info(t("downloader.copied_file", src=info.filename, dst=str(dst)))
+        return [(staged, dst)]
 
-    def _cleanup_files(self, patterns: List[str]) -> None:
-        """清理旧文件"""
-        if not patterns:
-            return
+    def _commit_staged(
+        self, targets: List[Tuple[Optional[Path], Path]], staging: Path
+    ) -> None:
+        """
+        以重命名将暂存内容替换到目标位置，暂存路径为 None 的目标仅移除
 
-        self.logger.info(t("downloader.start_cleanup"))
-        game_root = Path(self._config.game_path)
+        替换前写入 journal.json 记录每个目标的备份位置及替换前是否存在，
+        进程意外中断时下次安装据此整体回滚
+        """
+        backup_root = staging / "backup"
+        backup_root.mkdir()
+        journal = [
+            (str(dst), str(backup_root / str(i)), dst.exists() or dst.is_symlink())
+            for i, (_, dst) in enumerate(targets)
+        ]
+        with open(staging / STAGING_JOURNAL, "w", encoding="utf-8") as f:
+            json.dump(journal, f)
 
-        for pattern in patterns:
-            for path in game_root.glob(pattern):
+        done = []  # [(目标, 备份或 None)]
+        try:
+            for (staged, dst), (_, backup, _) in zip(targets, journal):
+                backup = Path(backup)
+                if dst.exists() or dst.is_symlink():
+                    os.replace(dst, backup)
+                    done.append((dst, backup))
+                else:
+                    done.append((dst, None))
+                if staged is not None:
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    os.replace(staged, dst)
+        except Exception:
+            self.logger.error(t("downloader.commit_rollback"))
+            for dst, backup in reversed(done):
+                self._restore_backup(dst, backup)
+            raise
+        # 删除 journal 即标记提交完成，之后清理暂存区时被打断也不会在下次安装时被回滚
+        os.remove(staging / STAGING_JOURNAL)
+
+    @staticmethod
+    def _prune_empty_dirs(removed: List[Path], game_root: Path) -> None:
+        """增量同步删除文件后，自下而上删除因此变空的目录（不超出游戏根目录）"""
+        parents = {path.parent for path in removed}
+        for folder in sorted(parents, key=lambda path: len(path.parts), reverse=True):
+            while folder != game_root and game_root in folder.parents:
                 try:
-                    if path.is_file():
-                        path.unlink()
-                        self.logger.debug(t("downloader.cleaned_file", path=str(path)))
-                    elif path.is_dir():
-                        shutil.rmtree(path)
-                        self.logger.debug(t("downloader.cleaned_dir", path=str(path)))
-                except Exception as e:
+                    folder.rmdir()  # 目录非空或不存在时抛出 OSError
+                except OSError:
+                    break
+                folder = folder.parent
+
+    @staticmethod
+    def _restore_backup(dst: Path, backup: Optional[Path]) -> None:
+        """撤销单个目标的替换"""
+        if dst.is_dir() and not dst.is_symlink():
+            shutil.rmtree(dst)
+        elif dst.exists() or dst.is_symlink():
+            dst.unlink()
+        if backup is not None and (backup.exists() or backup.is_symlink()):
+            # 父目录可能已在增量同步后被清理
+            dst.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(backup, dst)
+
+    def _recover_staging(self, game_root: Path) -> None:
+        """
+        处理上次中断遗留的暂存区
+
+        仍有 journal 的暂存区属于未完成提交的安装，按 journal 将全部目标回滚到安装前状态；
+        已提交的安装不再有 journal，直接删除。每一项都会尝试回滚，全部成功后才删除暂存区，
+        否则保留备份供下次重试
+        """
+        for staging in game_root.glob(f"{STAGING_PREFIX}*"):
+            journal_path = staging / STAGING_JOURNAL
+            if journal_path.exists():
+                try:
+                    with open(journal_path, "r", encoding="utf-8") as f:
+                        journal = json.load(f)
+                except (OSError, ValueError) as e:
                     self.logger.warning(
-                        t("downloader.cleanup_failed", path=str(path), error=str(e))
+                        t("downloader.cleanup_failed", path=str(staging), error=str(e))
                     )
+                    continue
+                failed = False
+                for entry in reversed(journal):
+                    try:
+                        self._rollback_entry(*entry)
+                    except OSError as e:
+                        failed = True
+                        self.logger.warning(
+                            t("downloader.cleanup_failed", path=entry[0], error=str(e))
+                        )
+                if failed:
+                    continue
+            self.logger.debug(t("downloader.cleaned_dir", path=str(staging)))
+            shutil.rmtree(staging, ignore_errors=True)
+
+    def _rollback_entry(self, dst: str, backup: str, existed: bool = True) -> None:
+        """
+        回滚 journal 中的单个目标
+
+        原先存在的目标：备份仍在说明已被移走或替换，用备份覆盖；备份不在说明尚未处理，保持不动。
+        原先不存在的目标：删除可能已放入的新内容
+        """
+        dst, backup = Path(dst), Path(backup)
+        if existed:
+            if backup.exists() or backup.is_symlink():
+                self._restore_backup(dst, backup)
+        elif dst.exists() or dst.is_symlink():
+            self._restore_backup(dst, None)
+
+    def _cleanup_files(self, patterns: List[str], dry_run: bool = False) -> List[Path]:
+        """
+        清理旧文件：单次遍历游戏目录，同时匹配全部模式并就地删除
+
+        :param patterns: glob 模式列表（语义同 Path.glob）
+        :param dry_run: 仅列出将被删除的路径，不实际删除
+        :return: 匹配到的路径
+        """
+        if not patterns:
+            return []
+
+        self.logger.info(t("downloader.start_cleanup"))
+        game_root = Path(self._config.game_path)
+        started = time.perf_counter()
+        matched = []
+
+        for path, is_dir in iter_matches(game_root, patterns):
+            matched.append(path)
+            if dry_run:
+                self.logger.info(t("downloader.cleanup_preview", path=str(path)))
+                continue
+            try:
+                if is_dir:
+                    shutil.rmtree(path)
+                    self.logger.debug(t("downloader.cleaned_dir", path=str(path)))
+                else:
+                    path.unlink()
+                    self.logger.debug(t("downloader.cleaned_file", path=str(path)))
+            except Exception as e:
+                self.logger.warning(
+                    t("downloader.cleanup_failed", path=str(path), error=str(e))
+                )
+
+        self.logger.info(
+            t(
+                "downloader.cleanup_finished",
+                count=len(matched),
+                elapsed=time.perf_counter() - started,
+            )
+        )
+        return matched
@@ -0,0 +1,272 @@
+import heapq
+import itertools
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from ..i18n import t
+from ..tools import FunctionThread
+
+# 主线程等待时的轮询间隔：Windows 上无超时的锁等待不会响应 Ctrl+C
+WAIT_INTERVAL = 0.5
+
+_scheduler: Optional["DownloadScheduler"] = None
+_scheduler_lock = threading.Lock()
+
+
+class DownloadCancelledError(Exception):
+    """下载任务已被取消"""
+
+
+class TokenBucket:
+    """
+    令牌桶限速器，所有下载线程共享同一个桶
+
+    允许透支：一次取走的令牌超过余量时，差额由调用线程休眠补足
+    """
+
+    def __init__(self, rate: int):
+        self._lock = threading.Lock()
+        self.set_rate(rate)
+
+    def set_rate(self, rate: int) -> None:
+        """设置速率（字节/秒），0 表示不限速"""
+        with self._lock:
+            self.rate = rate
+            self._tokens = float(rate)
+            self._updated = time.monotonic()
+
+    def consume(self, amount: int) -> None:
+        with self._lock:
+            if self.rate <= 0:
+                return
+            now = time.monotonic()
+            # 桶容量为 1 秒的流量
+            self._tokens = min(
+                float(self.rate), self._tokens + (now - self._updated) * self.rate
+            )
+            self._updated = now
+            self._tokens -= amount
+            deficit = -self._tokens
+            rate = self.rate
+        if deficit > 0:
+            time.sleep(deficit / rate)
+
+
+class DownloadJob:
+    """调度器中的单个任务"""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    DONE = "done"
+    FAILED = "failed"
+    CANCELLED = "cancelled"
+
+    def __init__(
+        self,
+        job_id: int,
+        name: str,
+        func: Callable[..., Any],
+        priority: int,
+        on_cancel: Callable[["DownloadJob"], None] = None,
+    ):
+        self.id = job_id
+        self.name = name
+        self.priority = priority
+        self.status = self.QUEUED
+        self.bytes = 0
+        self.result_value = None
+        self.error: Optional[BaseException] = None
+        self._func = func
+        self._on_cancel = on_cancel
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel_event.is_set()
+
+    def cancel(self) -> None:
+        """取消任务：排队中的任务立即结束，运行中的任务在下一个数据块处中止"""
+        self._cancel_event.set()
+        if self._on_cancel is not None:
+            self._on_cancel(self)
+
+    def done(self) -> bool:
+        return self._done_event.is_set()
+
+    def wait(self, timeout: float = None) -> bool:
+        return self._done_event.wait(timeout)
+
+    def result(self) -> Any:
+        """等待任务结束并返回结果，失败时抛出原异常；等待中被 Ctrl+C 打断则取消任务"""
+        try:
+            while not self._done_event.wait(WAIT_INTERVAL):
+                pass
+        except KeyboardInterrupt:
+            self.cancel()
+            raise
+        if self.error is not None:
+            raise self.error
+        return self.result_value
+
+    def __lt__(self, other: "DownloadJob") -> bool:
+        return (self.priority, self.id) < (other.priority, other.id)
+
+
+class DownloadScheduler:
+    """
+    下载调度器
+
+    按优先级（数值越小越先执行）排队，最多 max_parallel 个任务同时运行，
+    所有任务共享一个令牌桶作为全局带宽上限
+    """
+
+    def __init__(self, max_parallel: int = 3, bandwidth_limit: int = 0):
+        self.max_parallel = max(1, max_parallel)
+        self.bucket = TokenBucket(bandwidth_limit)
+        self._queue: List[DownloadJob] = []
+        self._ids = itertools.count(1)
+        self._cond = threading.Condition()
+        self._running = 0
+        self._workers: List[threading.Thread] = []
+        # 吞吐统计：仅在有任务运行时累计时间
+        self._total_bytes = 0
+        self._active_time = 0.0
+        self._active_since: Optional[float] = None
+
+    def configure(self, max_parallel: int = None, bandwidth_limit: int = None) -> None:
+        """运行中调整并发数和带宽上限"""
+        with self._cond:
+            if max_parallel is not None:
+                self.max_parallel = max(1, max_parallel)
+                self._cond.notify_all()
+        if bandwidth_limit is not None:
+            self.bucket.set_rate(bandwidth_limit)
+
+    def submit(
+        self, name: str, func: Callable[..., Any], priority: int = 0
+    ) -> DownloadJob:
+        """
+        提交任务
+
+        :param name: 任务名称（用于日志/展示）
+        :param func: 执行函数，调用方式为 func(tick)，其中 tick(n) 需在每个数据块写入后调用，
+            负责限速、计量，并在任务被取消时抛出 DownloadCancelledError
+        :param priority: 优先级，数值越小越先执行
+        """
+        with self._cond:
+            job = DownloadJob(
+                next(self._ids), name, func, priority, on_cancel=self._cancel_queued
+            )
+            heapq.heappush(self._queue, job)
+            self._ensure_workers()
+            self._cond.notify()
+        return job
+
+    def as_completed(self, jobs: List[DownloadJob]) -> Iterator[DownloadJob]:
+        """按完成顺序依次产出任务"""
+        pending = list(jobs)
+        with self._cond:
+            while pending:
+                finished = [job for job in pending if job.done()]
+                if not finished:
+                    self._cond.wait(WAIT_INTERVAL)
+                    continue
+                for job in finished:
+                    pending.remove(job)
+                    self._cond.release()
+                    try:
+                        yield job
+                    finally:
+                        self._cond.acquire()
+
+    def stats(self) -> Dict[str, float]:
+        """返回排队数、运行数、累计字节数及平均吞吐（字节/秒）"""
+        with self._cond:
+            active_time = self._active_time
+            if self._active_since is not None:
+                active_time += time.monotonic() - self._active_since
+            return {
+                "queued": len(self._queue),
+                "running": self._running,
+                "bytes": self._total_bytes,
+                "elapsed": active_time,
+                "throughput": self._total_bytes / active_time if active_time else 0.0,
+            }
+
+    def _ensure_workers(self) -> None:
+        self._workers = [worker for worker in self._workers if worker.is_alive()]
+        while len(self._workers) < self.max_parallel:
+            worker = FunctionThread(
+                target=self._worker_loop, name=f"DownloadWorker-{len(self._workers)}"
+            )
+            worker.start()
+            self._workers.append(worker)
+
+    def _worker_loop(self) -> None:
+        while True:
+            with self._cond:
+                while not self._queue or self._running >= self.max_parallel:
+                    self._cond.wait()
+                job = heapq.heappop(self._queue)
+                if job.cancelled:
+                    self._finish_locked(job, DownloadJob.CANCELLED)
+                    continue
+                job.status = DownloadJob.RUNNING
+                if self._running == 0:
+                    self._active_since = time.monotonic()
+                self._running += 1
+            self._run(job)
+
+    def _run(self, job: DownloadJob) -> None:
+        def tick(amount: int) -> None:
+            if job.cancelled:
+                raise DownloadCancelledError(
+                    t("downloader.job_cancelled", name=job.name)
+                )
+            self.bucket.consume(amount)
+            with self._cond:
+                job.bytes += amount
+                self._total_bytes += amount
+
+        status = DownloadJob.DONE
+        try:
+            job.result_value = job._func(tick)
+        except DownloadCancelledError as e:
+            job.error = e
+            status = DownloadJob.CANCELLED
+        except BaseException as e:
+            job.error = e
+            status = DownloadJob.FAILED
+        with self._cond:
+            self._running -= 1
+            if self._running == 0 and self._active_since is not None:
+                self._active_time += time.monotonic() - self._active_since
+                self._active_since = None
+            self._finish_locked(job, status)
+
+    def _cancel_queued(self, job: DownloadJob) -> None:
+        with self._cond:
+            if job.status == DownloadJob.QUEUED and job in self._queue:
+                self._queue.remove(job)
+                heapq.heapify(self._queue)
+                self._finish_locked(job, DownloadJob.CANCELLED)
+
+    def _finish_locked(self, job: DownloadJob, status: str) -> None:
+        job.status = status
+        if status == DownloadJob.CANCELLED and job.error is None:
+            job.error = DownloadCancelledError(
+                t("downloader.job_cancelled", name=job.name)
+            )
+        job._done_event.set()
+        self._cond.notify_all()
+
+
+def get_scheduler(max_parallel: int = 3, bandwidth_limit: int = 0) -> DownloadScheduler:
+    """获取全局共享的下载调度器，参数仅在首次创建时生效，之后请使用 configure()"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = DownloadScheduler(max_parallel, bandwidth_limit)
+        return _scheduler
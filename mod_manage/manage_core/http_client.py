@@ -0,0 +1,86 @@
+import threading
+import weakref
+import requests
+from urllib.parse import urlparse
+from typing import Dict, Optional
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from ..constants import CORE_VERSION
+
+DEFAULT_TIMEOUT = (10, 30)  # (连接超时, 读取超时) 秒
+POOL_CONNECTIONS = 10  # 缓存连接池的主机数
+POOL_MAXSIZE = 16  # 每个主机保持的最大连接数，需不小于分段下载并发数
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+class PooledAdapter(HTTPAdapter):
+    """带默认超时和按主机统计连接复用情况的适配器"""
+
+    def __init__(self, timeout=DEFAULT_TIMEOUT, **kwargs):
+        self.timeout = timeout
+        self.stats: Dict[str, Dict[str, int]] = {}
+        self._stats_lock = threading.Lock()
+        self._pool_connections_seen = weakref.WeakKeyDictionary()
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        response = super().send(request, **kwargs)
+        self._record(request.url, getattr(response.raw, "_pool", None))
+        return response
+
+    def _record(self, url: str, pool) -> None:
+        """累计请求数，并根据连接池新建连接数的增量统计新连接"""
+        host = urlparse(url).netloc
+        with self._stats_lock:
+            stat = self.stats.setdefault(host, {"requests": 0, "connections": 0})
+            stat["requests"] += 1
+            if pool is not None:
+                seen = self._pool_connections_seen.get(pool, 0)
+                stat["connections"] += pool.num_connections - seen
+                self._pool_connections_seen[pool] = pool.num_connections
+
+
+def get_session() -> requests.Session:
+    """获取全局共享的 keep-alive 会话（首次调用时创建）"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = _create_session()
+        return _session
+
+
+def _create_session() -> requests.Session:
+    session = requests.Session()
+    session.headers.update({"User-Agent": f"MHWildsModManager/{CORE_VERSION}"})
+    retry = Retry(
+        total=3,
+        backoff_factor=0.5,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=("GET", "HEAD"),
+        raise_on_status=False,
+    )
+    adapter = PooledAdapter(
+        pool_connections=POOL_CONNECTIONS, pool_maxsize=POOL_MAXSIZE, max_retries=retry
+    )
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_connection_stats() -> Dict[str, Dict[str, int]]:
+    """
+    返回各主机的连接复用统计
+
+    :return: {host: {"requests": 请求数, "connections": 新建连接数, "reused": 复用次数}}
+    """
+    adapter = get_session().get_adapter("https://")
+    with adapter._stats_lock:
+        return {
+            host: dict(stat, reused=stat["requests"] - stat["connections"])
+            for host, stat in adapter.stats.items()
+        }
@@ -3,6 +3,7 @@ import sys
 from ..context import GlobalContext
 from ..tools import find_steam_game_path
 from .cli_system import CliSystem
+from .mod_registry import get_registry
 
 global _log_system, _config
 
@@ -20,6 +21,9 @@ def main(core: bool = False) -> None:
         _config.game_path = game_path if game_path else ""
         _config.save()
 
+    # 打开MOD登记表，首次运行时迁移旧配置中的 installed_mods
+    get_registry()
+
     _log_system.info("Core Started.")
     _log_system.debug("Debug information is being displayed.")
 
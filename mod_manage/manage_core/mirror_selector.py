@@ -0,0 +1,115 @@
+import os
+import json
+import time
+import threading
+import requests
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional
+from urllib.parse import urlparse
+
+from .http_client import get_session
+
+PROBE_BYTES = 256 * 1024  # 每个镜像试探下载的字节数
+PROBE_TIMEOUT = (5, 5)
+
+
+class MirrorSelector:
+    """
+    镜像选择器
+
+    对直连及各代理地址并发发起小范围 Range 请求，测量首字节时间和初期吞吐，
+    按试探耗时从快到慢排序；排序结果按 TTL 缓存在磁盘上，重复启动无需再次试探
+    """
+
+    def __init__(self, cache_path: str, ttl: int):
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def rank(self, url: str, mirrors: List[str]) -> List[str]:
+        """
+        返回按速度排序的镜像前缀列表（"" 表示直连），试探失败的镜像排在最后
+
+        :param url: 原始下载地址，镜像地址为 前缀 + url
+        :param mirrors: 候选镜像前缀
+        """
+        mirrors = list(dict.fromkeys(mirrors))  # 去重并保持顺序
+        if len(mirrors) <= 1:
+            return mirrors
+        key = self._key(url, mirrors)
+
+        with self._lock:
+            cached = self._load().get(key)
+        if cached and time.time() - cached["time"] < self.ttl:
+            return cached["order"] + [m for m in mirrors if m not in cached["order"]]
+
+        results = self.probe(url, mirrors)
+        order = sorted(
+            mirrors, key=lambda m: results[m]["elapsed"] if results[m] else float("inf")
+        )
+        with self._lock:
+            data = self._load()
+            data[key] = {"time": time.time(), "order": order, "results": results}
+            self._save(data)
+        return order
+
+    def probe(self, url: str, mirrors: List[str]) -> Dict[str, Optional[Dict]]:
+        """并发试探所有镜像，失败的镜像结果为 None"""
+        with ThreadPoolExecutor(
+            max_workers=len(mirrors), thread_name_prefix="MirrorProbe"
+        ) as executor:
+            results = executor.map(lambda m: self._probe_one(m + url), mirrors)
+            return dict(zip(mirrors, results))
+
+    @staticmethod
+    def _probe_one(url: str) -> Optional[Dict[str, float]]:
+        """返回 {ttfb: 首字节秒数, throughput: 字节/秒, elapsed: 试探总耗时}"""
+        started = time.perf_counter()
+        headers = {"Range": f"bytes=0-{PROBE_BYTES - 1}"}
+        try:
+            with get_session().get(
+                url, headers=headers, stream=True, timeout=PROBE_TIMEOUT
+            ) as r:
+                r.raise_for_status()
+                ttfb = None
+                received = 0
+                for chunk in r.iter_content(chunk_size=16384):
+                    if ttfb is None:
+                        ttfb = time.perf_counter() - started
+                    received += len(chunk)
+                    if received >= PROBE_BYTES:
+                        break
+        except requests.exceptions.RequestException:
+            return None
+        elapsed = time.perf_counter() - started
+        if not received:
+            return None
+        transfer = max(elapsed - ttfb, 1e-6)
+        return {"ttfb": ttfb, "throughput": received / transfer, "elapsed": elapsed}
+
+    def _load(self) -> Dict:
+        try:
+            with open(self.cache_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self, data: Dict) -> None:
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        with open(self.cache_path, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+
+    def demote(self, url: str, mirrors: List[str], mirror: str) -> None:
+        """下载中途镜像停滞时，将其移到缓存排序的末尾"""
+        key = self._key(url, list(dict.fromkeys(mirrors)))
+        with self._lock:
+            data = self._load()
+            if key in data and mirror in data[key]["order"]:
+                data[key]["order"].remove(mirror)
+                data[key]["order"].append(mirror)
+                self._save(data)
+
+    @staticmethod
+    def _key(url: str, mirrors: List[str]) -> str:
+        """排序按目标主机和候选集合缓存"""
+        return "|".join([urlparse(url).netloc] + sorted(mirrors))
@@ -0,0 +1,238 @@
+import os
+import json
+import time
+import sqlite3
+import threading
+from typing import Dict, Iterable, List, Optional, Union
+
+from ..context import GlobalContext
+from ..i18n import t
+
+SCHEMA_VERSION = 1
+
+_registry: Optional["ModRegistry"] = None
+_registry_lock = threading.Lock()
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS mods (
+    id TEXT PRIMARY KEY,
+    name TEXT NOT NULL,
+    version TEXT NOT NULL DEFAULT '',
+    installed_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    extra TEXT NOT NULL DEFAULT '{}'
+);
+CREATE INDEX IF NOT EXISTS idx_mods_updated ON mods(updated_at);
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    mod_id TEXT NOT NULL REFERENCES mods(id) ON DELETE CASCADE,
+    sha256 TEXT,
+    size INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_files_mod ON files(mod_id);
+"""
+
+
+class ModRegistry:
+    """
+    已安装MOD登记表
+
+    基于 SQLite 保存MOD、版本、安装时间及逐文件清单，按MOD id 和文件路径建立索引；
+    修改只写入变化的行，不再随配置文件整体序列化。文件路径统一为相对游戏目录的 "/" 分隔形式
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        if os.path.dirname(db_path):
+            os.makedirs(os.path.dirname(db_path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        with self._lock, self._conn:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA foreign_keys=ON")
+            self._conn.executescript(_SCHEMA)
+            self._conn.execute(
+                "INSERT OR IGNORE INTO meta (key, value) VALUES ('schema_version', ?)",
+                (str(SCHEMA_VERSION),),
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+    def upsert_mod(
+        self,
+        mod_id: str,
+        name: str,
+        version: str = "",
+        files: Union[Iterable[str], Dict[str, Dict]] = (),
+        extra: Dict = None,
+        installed_at: float = None,
+    ) -> None:
+        """
+        登记或更新MOD，文件清单整体替换
+
+        :param files: 文件路径列表，或 {路径: {"sha256": ..., "size": ...}}
+        :param extra: 其他附加信息（JSON 可序列化）
+        :param installed_at: 首次安装时间，默认为当前时间；更新已有MOD时保留原值
+        """
+        with self._lock, self._conn:
+            self._upsert_locked(mod_id, name, version, files, extra, installed_at)
+
+    def _upsert_locked(
+        self,
+        mod_id: str,
+        name: str,
+        version: str,
+        files: Union[Iterable[str], Dict[str, Dict]],
+        extra: Dict,
+        installed_at: float,
+    ) -> None:
+        """在调用方持有的事务中写入MOD及其文件清单"""
+        now = time.time()
+        if not isinstance(files, dict):
+            files = {path: {} for path in files}
+        self._conn.execute(
+            """
+            INSERT INTO mods (id, name, version, installed_at, updated_at, extra)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(id) DO UPDATE SET
+                name = excluded.name,
+                version = excluded.version,
+                updated_at = excluded.updated_at,
+                extra = excluded.extra
+            """,
+            (
+                mod_id,
+                name,
+                version,
+                installed_at or now,
+                now,
+                json.dumps(extra or {}, ensure_ascii=False),
+            ),
+        )
+        self._conn.execute("DELETE FROM files WHERE mod_id = ?", (mod_id,))
+        # 文件归属最后安装的MOD（覆盖安装时转移所有权）
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO files (path, mod_id, sha256, size)"
+            " VALUES (?, ?, ?, ?)",
+            [
+                (_norm(path), mod_id, info.get("sha256"), info.get("size"))
+                for path, info in files.items()
+            ],
+        )
+
+    def remove_mod(self, mod_id: str) -> List[str]:
+        """删除MOD登记，返回其拥有的文件路径"""
+        with self._lock, self._conn:
+            paths = self.files_of(mod_id)
+            self._conn.execute("DELETE FROM mods WHERE id = ?", (mod_id,))
+        return paths
+
+    def get_mod(self, mod_id: str) -> Optional[Dict]:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM mods WHERE id = ?", (mod_id,)
+            ).fetchone()
+        return _mod_dict(row) if row else None
+
+    def list_mods(self) -> List[Dict]:
+        with self._lock:
+            rows = self._conn.execute("SELECT * FROM mods ORDER BY name").fetchall()
+        return [_mod_dict(row) for row in rows]
+
+    def updated_since(self, timestamp: float) -> List[Dict]:
+        """在指定时间之后安装或更新过的MOD，最近的在前"""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT * FROM mods WHERE updated_at > ? ORDER BY updated_at DESC",
+                (timestamp,),
+            ).fetchall()
+        return [_mod_dict(row) for row in rows]
+
+    def files_of(self, mod_id: str) -> List[str]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT path FROM files WHERE mod_id = ? ORDER BY path", (mod_id,)
+            ).fetchall()
+        return [row["path"] for row in rows]
+
+    def owner_of(self, path: str) -> Optional[str]:
+        """文件所属的MOD id"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT mod_id FROM files WHERE path = ?", (_norm(path),)
+            ).fetchone()
+        return row["mod_id"] if row else None
+
+    def count(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM mods").fetchone()[0]
+
+    def migrate_from_config(self, installed_mods: Dict) -> int:
+        """
+        从配置中的 installed_mods 导入
+
+        每项的键作为MOD id，值中的 name / version / files / installed_at 写入对应列，
+        其余内容保存在 extra 中；登记表中已有的MOD保持不变（以登记表为准），
+        因此重复调用或恢复旧配置后再次调用都不会丢失或覆盖数据
+        :return: 新导入的MOD数量
+        """
+        imported = 0
+        with self._lock:
+            # 整个迁移在同一事务中完成，中途失败不会留下部分数据
+            with self._conn:
+                for mod_id, info in installed_mods.items():
+                    mod_id = str(mod_id)
+                    exists = self._conn.execute(
+                        "SELECT 1 FROM mods WHERE id = ?", (mod_id,)
+                    ).fetchone()
+                    if exists:
+                        continue
+                    info = dict(info) if isinstance(info, dict) else {"version": info}
+                    name = str(info.pop("name", mod_id))
+                    version = str(info.pop("version", ""))
+                    files = info.pop("files", None) or ()
+                    installed_at = info.pop("installed_at", None)
+                    self._upsert_locked(
+                        mod_id, name, version, files, info, installed_at
+                    )
+                    imported += 1
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value)"
+                    " VALUES ('migrated_installed_mods', ?)",
+                    (str(time.time()),),
+                )
+        return imported
+
+
+def _norm(path: str) -> str:
+    return path.replace("\\", "/").strip("/")
+
+
+def _mod_dict(row: sqlite3.Row) -> Dict:
+    mod = dict(row)
+    mod["extra"] = json.loads(mod["extra"])
+    return mod
+
+
+def get_registry() -> ModRegistry:
+    """获取全局MOD登记表，首次打开时从配置的 installed_mods 迁移旧数据"""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            config = GlobalContext.get_config()
+            _registry = ModRegistry(config.mod_registry_path)
+            if config.installed_mods:
+                # 已登记的MOD会被跳过，其余全部导入后才清空旧字段，不会丢弃任何条目
+                count = _registry.migrate_from_config(config.installed_mods)
+                if count:
+                    GlobalContext.get_logger().info(t("registry.migrated", count=count))
+                config.installed_mods = {}
+                config.save()
+        return _registry
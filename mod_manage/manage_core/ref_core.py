@@ -1,11 +1,24 @@
 import os
 import json
+import time
+import datetime
 import requests
+import threading
 from pathlib import Path
+from typing import List, Optional
 
 from ..context import GlobalContext
 from ..i18n import t
+from ..tools import FunctionThread
 from .download_helper import FileUpdater
+from .http_client import get_session
+from .ref_snapshots import SnapshotStore
+from .release_index import ReleaseIndex, ReleaseRecord, extract_version
+
+RELEASES_PER_PAGE = 100  # GitHub API 允许的单页最大数量
+RELEASE_CACHE_FORMAT = 2  # 缓存中保存精简记录，格式变化时旧缓存自动失效
+REF_COPY_RULES = [{"src": "dinput8.dll", "dst": "dinput8.dll"}]
+REF_FILES = [rule["dst"] for rule in REF_COPY_RULES]  # 快照中保存的文件
 
 
 class RefManage(object):
@@ -13,115 +26,238 @@ class RefManage(object):
         self._log_system = GlobalContext.get_logger()
         self._config = GlobalContext.get_config()
         self._file_downloader = FileUpdater()
+        self._snapshots = SnapshotStore(
+            os.path.join(self._config.cache_dir, "ref_snapshots"),
+            self._config.ref_snapshot_keep,
+        )
         self._url = "https://api.github.com/repos/praydog/REFramework-nightly/releases"
-        self._releases = None
-        self._get_release_list()
+        self._releases = []
+        self._index = ReleaseIndex([])
+        self._loader = None
+        self._loaded = threading.Event()  # 第一页（或缓存）已可用
+        self._all_loaded = threading.Event()  # 全部页获取结束（含失败）
+
+    def load_async(self) -> None:
+        """在后台线程获取Release列表，立即返回；重复调用不会重复加载"""
+        if self._loader is not None:
+            return
+        self._loader = FunctionThread(target=self._load, name="RefReleaseLoader")
+        self._loader.start()
+
+    def _load(self) -> None:
+        try:
+            self._get_release_list()
+        finally:
+            self._loaded.set()
+            self._all_loaded.set()
+
+    @property
+    def loaded(self) -> bool:
+        return self._loaded.is_set()
+
+    def wait_loaded(self, timeout: float = None) -> bool:
+        """等待Release列表加载完成（尚未开始时先启动加载），返回是否已完成"""
+        self.load_async()
+        return self._loaded.wait(timeout)
 
     def get_release_list_all_page(self, one_page: int) -> int:
         """以一页 one_page 个获取全部页码"""
-        return len(self._releases) // one_page + (
-            1 if len(self._releases) % one_page else 0
-        )
+        self.wait_loaded()
+        return self._index.page_count(one_page)
 
     def get_release_list_page(self, one_page: int, page: int) -> list:
         """以每页 one_page 个的格式返回Release列表"""
-        release_list = []
-        for release in self._releases[(page - 1) * one_page : page * one_page]:
-            release_list.append(
-                [
-                    release.get("name", None),
-                    str(self.extract_version(release.get("tag_name", None))),
-                    release.get("tag_name", None),
-                    release.get("published_at", None),
-                    release.get("assets", None)[3].get("browser_download_url", None),
-                ]
-            )
-        return release_list
+        self.wait_loaded()
+        return self._index.page(one_page, page)
 
-    def search_release(self, version) -> list:
+    def search_release(self, version) -> Optional[ReleaseRecord]:
         """搜索realse"""
-        # 将目标版本号转换为整数
+        target = self._parse_version(version)
+        self.wait_loaded()
+        release = self._index.find(target)
+        if release is None and not self._all_loaded.is_set():
+            # 较旧的版本可能在尚未获取的页中，等待后台加载结束后再查
+            while not self._all_loaded.wait(0.5):
+                pass
+            release = self._index.find(target)
+        return release  # 未找到时为 None
+
+    @staticmethod
+    def _parse_version(version) -> int:
+        """将目标版本号转换为整数"""
         try:
-            target = int(version)
-        except ValueError:
+            return int(version)
+        except (TypeError, ValueError):
             raise ValueError("目标版本号必须是数字字符串或整数")
 
-        for item in self._releases:
+    def latest_release(self) -> Optional[ReleaseRecord]:
+        """最新发布的Release，列表为空时为 None"""
+        self.wait_loaded()
+        return self._index.latest()
+
+    def _set_releases(self, releases: List[ReleaseRecord]) -> None:
+        """替换Release列表并重建索引"""
+        self._index = ReleaseIndex(releases)
+        self._releases = releases
+
+    def _parse_releases(self, page: List[dict]) -> List[ReleaseRecord]:
+        """将 GitHub 返回的一页Release解析为精简记录，原始 JSON 随后即可释放"""
+        records = []
+        for release in page:
             try:
-                current_version = self.extract_version(item["tag_name"])
-                if current_version == target:
-                    return [
-                        item.get("name", None),
-                        str(self.extract_version(item.get("tag_name", None))),
-                        item.get("tag_name", None),
-                        item.get("published_at", None),
-                        item.get("assets", None)[3].get("browser_download_url", None),
-                    ]
+                records.append(
+                    ReleaseRecord.from_github(release, self._config.ref_asset_pattern)
+                )
             except ValueError:
-                continue  # 跳过无法提取版本号的项
-        return None  # 未找到匹配项
+                continue  # 跳过无法提取版本号或没有对应资源的项
+        return records
 
     def install_ref(self, version: str) -> bool:
-        """安装Re框架"""
+        """安装Re框架，本地已有该版本快照时直接切换"""
         if not self._config.game_path:
             self._log_system.error(t("core.game_path_error"))
             return False
+        version = self._parse_version(version)
+        if self.switch_ref(version):
+            return True
         release = self.search_release(version)
         if not release:
             return False
-        url = release[4]
-        if self._config.proxy_mode:
-            url = self._config.proxy_url + url
-        copy_rules = [{"src": "dinput8.dll", "dst": "dinput8.dll"}]
-        self._file_downloader.install_from_zip(url, copy_rules)
-        self._config.installed_ref_version = release[2]
-        self._config.save()
+        self._snapshot_installed()
+        digest = self._file_downloader.install_from_zip(
+            release.url,
+            REF_COPY_RULES,
+            cache_keys=[f"ref:{release.tag}"],
+            checksum=release.digest,
+            expected_size=release.size,
+            mirrors=self._mirrors(),
+        )
+        self._snapshots.save(
+            release.tag, release.version, self._config.game_path, REF_FILES, digest
+        )
+        with self._config.batch():
+            self._config.installed_ref_version = release.tag
+            self._config.installed_ref_digest = digest
         return True
 
+    def switch_ref(self, version: str) -> bool:
+        """从本地快照切换到指定版本，没有该版本快照时返回 False"""
+        if not self._config.game_path:
+            self._log_system.error(t("core.game_path_error"))
+            return False
+        tag = self._snapshots.find_version(self._parse_version(version))
+        if not tag:
+            return False
+        self._snapshot_installed()
+        if not self._snapshots.restore(tag, self._config.game_path):
+            return False
+        self._log_system.info(t("cli.ref_snapshot_restored", tag=tag))
+        with self._config.batch():
+            self._config.installed_ref_version = tag
+            self._config.installed_ref_digest = self._snapshots.get(tag).get(
+                "digest", ""
+            )
+        return True
+
+    def list_snapshots(self) -> List[dict]:
+        """本地保存的版本快照，最近使用的在前"""
+        return self._snapshots.list()
+
+    def _snapshot_installed(self) -> None:
+        """替换或删除前为当前安装的版本建立快照（已有快照时跳过）"""
+        tag = self._config.installed_ref_version
+        if not tag or self._snapshots.has(tag):
+            return
+        try:
+            version = self.extract_version(tag)
+        except ValueError:
+            return
+        self._snapshots.save(
+            tag,
+            version,
+            self._config.game_path,
+            REF_FILES,
+            self._config.installed_ref_digest,
+        )
+
+    def _mirrors(self) -> list:
+        """
+        下载线路候选：开启测速时为直连加用户启用的代理，否则按 proxy_mode 固定一条
+
+        默认的 proxy_url 只有在 proxy_mode 开启时才会使用，未启用代理的用户不会经过第三方主机
+        """
+        proxies = list(self._config.proxy_urls)
+        if self._config.proxy_mode:
+            proxies.insert(0, self._config.proxy_url)
+        if self._config.mirror_racing:
+            return [""] + [proxy for proxy in proxies if proxy]
+        return [self._config.proxy_url] if self._config.proxy_mode else [""]
+
     def uninstall_ref(self) -> None:
         """卸载Re框架"""
         if not self._config.game_path:
             self._log_system.error(t("core.game_path_error"))
             return False
+        self._snapshot_installed()
         os.remove(Path(self._config.game_path) / "dinput8.dll")
-        self._config.installed_ref_version = ""
-        self._config.save()
+        with self._config.batch():
+            self._config.installed_ref_version = ""
+            self._config.installed_ref_digest = ""
         return True
 
     def _get_release_list(self) -> None:
-        """初始化ref版本列表文件"""
-        try:
-            # 发送 GET 请求（添加 User-Agent 是 GitHub API 的要求）
-            response = requests.get(self._url, headers={"User-Agent": "Mozilla/5.0"})
-
-            # 检查响应状态码
-            if response.status_code == 200:
-                self._releases = response.json()
-
-                self._log_system.info(t("cli.ref_getted"))
+        """
+        初始化ref版本列表
 
-                if not self._releases:
-                    self._log_system.warning(t("github.cant_get_release"))
-                    return
+        列表连同 ETag / Last-Modified 缓存在磁盘上：TTL 内直接使用缓存，不发起请求；
+        过期后对第一页发起条件请求，304 不计入 GitHub 速率限制；网络不可用时退回旧缓存。
+        第一页到达后即可使用，其余页沿 Link 头在后台线程中继续获取并合并进缓存
+        """
+        cache = self._load_release_cache()
+        if (
+            cache
+            and not cache.get("next")
+            and time.time() - cache["fetched_at"] < self._config.release_cache_ttl
+        ):
+            self._set_releases(cache["releases"])
+            self._log_system.info(t("github.release_cache_used"))
+            self._check_update()
+            return
 
-                latest_release = self._releases[0]
-                latest_version = self.extract_version(
-                    latest_release.get("tag_name", None)
-                )
-                now_verison = self.extract_version(self._config.installed_ref_version)
-
-                if not now_verison:
-                    return
-
-                if latest_version > now_verison:
-                    self._log_system.warning(
-                        t(
-                            "github.need_update",
-                            latest_version=latest_version,
-                            version=now_verison,
-                        )
-                    )
+        headers = {"Accept": "application/vnd.github+json"}
+        if cache:
+            if cache.get("etag"):
+                headers["If-None-Match"] = cache["etag"]
+            if cache.get("last_modified"):
+                headers["If-Modified-Since"] = cache["last_modified"]
+        try:
+            # 共享会话已带有 GitHub API 要求的 User-Agent
+            response = get_session().get(
+                self._url, params={"per_page": RELEASES_PER_PAGE}, headers=headers
+            )
 
+            # 检查响应状态码
+            if response.status_code == 304 and cache:
+                cache["fetched_at"] = time.time()
+                self._save_release_cache(cache)
+                self._set_releases(cache["releases"])
+                self._log_system.info(t("github.release_not_modified"))
+                self._check_update()
+                # 上次未取完的旧页继续获取
+                if cache.get("next"):
+                    self._loaded.set()
+                    self._ingest_pages(cache, None, True)
+                return
+            elif response.status_code == 200:
+                cache = {
+                    "fetched_at": time.time(),
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                    "releases": cache["releases"] if cache else [],
+                    "next": cache.get("next") if cache else None,
+                }
+                self._ingest_pages(cache, response, False)
+                return
             else:
                 self._log_system.error(
                     t(
@@ -130,18 +266,148 @@ class RefManage(object):
                         reason=response.text,
                     )
                 )
+                self._use_stale_cache(cache)
 
         except requests.exceptions.RequestException as e:
             self._log_system.error(t("github.get_error", reason=str(e)))
+            self._use_stale_cache(cache)
         except json.JSONDecodeError:
-            self._log_system.error(t("github.json.error"))
+            self._log_system.error(t("github.json_error"))
+            self._use_stale_cache(cache)
 
-    def extract_version(self, tag) -> int:
-        if not tag:
+        self._check_update()
+
+    def _ingest_pages(
+        self, cache: dict, response: Optional[requests.Response], joined: bool
+    ) -> None:
+        """
+        逐页合并Release列表，每页合并后立即更新内存列表和磁盘缓存
+
+        新发布位于最前面的页中：一旦某页出现已缓存的发布（与缓存衔接），
+        之后只需接着获取上次未取完的旧页（cache["next"]），无需重新翻阅已缓存部分
+
+        :param response: 第一页的响应，为 None 时从 cache["next"] 开始获取
+        :param joined: 是否已与缓存衔接（True 时新条目追加到末尾）
+        """
+        old = cache["releases"]
+        backlog = cache["next"]
+        known = {release.id for release in old}
+        head, tail = [], []
+        try:
+            if response is None:
+                response = self._fetch_page(backlog)
+            while True:
+                page = response.json()
+                new = [release for release in page if release["id"] not in known]
+                known.update(release["id"] for release in new)
+                (tail if joined else head).extend(self._parse_releases(new))
+                next_url = response.links.get("next", {}).get("url")
+                if not joined and len(new) < len(page):
+                    joined = True
+                    next_url = backlog
+
+                self._set_releases(head + old + tail)
+                cache["releases"] = self._releases
+                cache["next"] = next_url
+                self._save_release_cache(cache)
+                if not self._loaded.is_set():
+                    self._log_system.info(t("cli.ref_getted"))
+                    self._check_update()
+                    # 第一页已可用，不必等待其余页
+                    self._loaded.set()
+                if not next_url:
+                    break
+                response = self._fetch_page(next_url)
+        except requests.exceptions.RequestException as e:
+            # 已获取的页已保存，下次刷新从断点继续
+            self._log_system.error(t("github.get_error", reason=str(e)))
+            return
+        except json.JSONDecodeError:
+            self._log_system.error(t("github.json_error"))
+            return
+        self._log_system.info(t("github.release_pages_done", count=len(self._releases)))
+
+    @staticmethod
+    def _fetch_page(url: str) -> requests.Response:
+        response = get_session().get(
+            url, headers={"Accept": "application/vnd.github+json"}
+        )
+        response.raise_for_status()
+        return response
+
+    def _check_update(self) -> None:
+        """已安装版本落后于最新版本时给出提示"""
+        latest_release = self._index.latest()
+        if not latest_release:
+            self._log_system.warning(t("github.cant_get_release"))
             return
-        parts = tag.split("-")
-        # 确保分割后至少有3部分：["nightly", "01090", "commit_hash"]
-        if len(parts) >= 3 and parts[1].isdigit():
-            return int(parts[1])
-        else:
-            raise ValueError(f"无效的版本标签格式: {tag}")
+
+        latest_version = latest_release.version
+        now_verison = self.extract_version(self._config.installed_ref_version)
+
+        if not now_verison:
+            return
+
+        if latest_version > now_verison:
+            self._log_system.warning(
+                t(
+                    "github.need_update",
+                    latest_version=latest_version,
+                    version=now_verison,
+                )
+            )
+
+    def _use_stale_cache(self, cache: dict) -> None:
+        """请求失败时使用过期的缓存列表"""
+        if not cache:
+            return
+        self._set_releases(cache["releases"])
+        self._log_system.warning(
+            t(
+                "github.release_cache_stale",
+                time=datetime.datetime.fromtimestamp(cache["fetched_at"]).strftime(
+                    "%Y-%m-%d %H:%M:%S"
+                ),
+            )
+        )
+
+    def _release_cache_path(self) -> str:
+        return os.path.join(self._config.cache_dir, "releases.json")
+
+    def _load_release_cache(self) -> dict:
+        try:
+            with open(self._release_cache_path(), "r", encoding="utf-8") as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(cache, dict) or cache.get("format") != RELEASE_CACHE_FORMAT:
+            return None
+        try:
+            cache["releases"] = [
+                ReleaseRecord.from_dict(record) for record in cache["releases"]
+            ]
+        except (KeyError, TypeError):
+            return None
+        return cache
+
+    def _save_release_cache(self, cache: dict) -> None:
+        """先写临时文件再替换，避免中断时留下损坏的缓存"""
+        path = self._release_cache_path()
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        tmp_path = path + ".tmp"
+        try:
+            data = dict(
+                cache,
+                format=RELEASE_CACHE_FORMAT,
+                releases=[record.to_dict() for record in cache["releases"]],
+            )
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            self._log_system.warning(
+                t("github.release_cache_save_failed", error=str(e))
+            )
+
+    def extract_version(self, tag) -> int:
+        return extract_version(tag)
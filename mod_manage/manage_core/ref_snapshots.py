@@ -0,0 +1,196 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+
+
+class SnapshotStore:
+    """
+    REFramework 版本快照
+
+    每个安装过的版本按标签记录文件清单 {相对路径: sha256}，文件内容按 sha256 保存在 objects/ 下，
+    不同版本间内容相同的文件只存一份。切换版本只需从本地对象复制并替换游戏目录中的文件；
+    快照数量超出保留数时按最近使用时间淘汰，并回收不再被引用的对象
+    """
+
+    def __init__(self, root: str, keep: int):
+        self.root = root
+        self.keep = keep
+        self._objects_dir = os.path.join(root, "objects")
+        self._index_path = os.path.join(root, "index.json")
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.keep > 0
+
+    def has(self, tag: str) -> bool:
+        with self._lock:
+            return tag in self._load_index()
+
+    def find_version(self, version: int) -> Optional[str]:
+        """按版本号查找快照，返回其标签"""
+        with self._lock:
+            for tag, snapshot in self._load_index().items():
+                if snapshot["version"] == version:
+                    return tag
+        return None
+
+    def list(self) -> List[Dict]:
+        """返回按最近使用排序的快照 [{tag, version, digest, size, last_used}]"""
+        with self._lock:
+            index = self._load_index()
+        snapshots = []
+        for tag, snapshot in index.items():
+            size = sum(
+                os.path.getsize(self._object_path(digest))
+                for digest in snapshot["files"].values()
+                if os.path.exists(self._object_path(digest))
+            )
+            snapshots.append(
+                {
+                    "tag": tag,
+                    "version": snapshot["version"],
+                    "digest": snapshot.get("digest", ""),
+                    "size": size,
+                    "last_used": snapshot["last_used"],
+                }
+            )
+        snapshots.sort(key=lambda item: item["last_used"], reverse=True)
+        return snapshots
+
+    def get(self, tag: str) -> Optional[Dict]:
+        with self._lock:
+            return self._load_index().get(tag)
+
+    def save(
+        self, tag: str, version: int, game_path: str, files: List[str], digest: str = ""
+    ) -> None:
+        """
+        为游戏目录中当前安装的版本建立快照
+
+        :param files: 该版本安装的文件（相对游戏目录）
+        :param digest: 安装包的 sha256，切换回该版本时写回配置
+        """
+        if not self.enabled:
+            return
+        manifest = {}
+        for name in files:
+            path = Path(game_path) / name
+            if path.is_file():
+                manifest[name] = self._store_object(path)
+        if not manifest:
+            return
+        with self._lock:
+            index = self._load_index()
+            index[tag] = {
+                "version": version,
+                "digest": digest,
+                "files": manifest,
+                "last_used": time.time(),
+            }
+            self._evict_locked(index, protect=tag)
+            self._save_index(index)
+
+    def restore(self, tag: str, game_path: str) -> bool:
+        """
+        将游戏目录切换到指定快照
+
+        先把全部文件复制到目标旁的临时文件，再逐个 os.replace，避免留下半新半旧的状态；
+        快照缺少对象文件（被手动删除等）时丢弃该快照并返回 False，由调用方重新下载
+        """
+        with self._lock:
+            index = self._load_index()
+            snapshot = index.get(tag)
+            if not snapshot:
+                return False
+            if not all(
+                os.path.isfile(self._object_path(digest))
+                for digest in snapshot["files"].values()
+            ):
+                del index[tag]
+                self._collect_locked(index)
+                self._save_index(index)
+                return False
+            staged = []
+            try:
+                for name, digest in snapshot["files"].items():
+                    dst = Path(game_path) / name
+                    tmp = dst.with_name(f".{dst.name}.mhwmm_tmp")
+                    dst.parent.mkdir(parents=True, exist_ok=True)
+                    shutil.copyfile(self._object_path(digest), tmp)
+                    staged.append((tmp, dst))
+                for tmp, dst in staged:
+                    os.replace(tmp, dst)
+            finally:
+                for tmp, _ in staged:
+                    if tmp.exists():
+                        tmp.unlink()
+            snapshot["last_used"] = time.time()
+            self._save_index(index)
+        return True
+
+    def remove(self, tag: str) -> None:
+        with self._lock:
+            index = self._load_index()
+            if index.pop(tag, None) is not None:
+                self._collect_locked(index)
+                self._save_index(index)
+
+    def _store_object(self, path: Path) -> str:
+        sha256 = hashlib.sha256()
+        with open(path, "rb") as f:
+            for block in iter(lambda: f.read(1024 * 1024), b""):
+                sha256.update(block)
+        digest = sha256.hexdigest()
+        target = self._object_path(digest)
+        if not os.path.exists(target):
+            os.makedirs(os.path.dirname(target), exist_ok=True)
+            temp_path = target + ".tmp"
+            shutil.copyfile(path, temp_path)
+            os.replace(temp_path, target)
+        return digest
+
+    def _evict_locked(self, index: Dict, protect: str) -> None:
+        """保留最近使用的 keep 个快照"""
+        by_age = sorted(index, key=lambda tag: index[tag]["last_used"], reverse=True)
+        for tag in by_age[self.keep :]:
+            if tag != protect:
+                del index[tag]
+        self._collect_locked(index)
+
+    def _collect_locked(self, index: Dict) -> None:
+        """删除不再被任何快照引用的对象"""
+        referenced = {
+            digest
+            for snapshot in index.values()
+            for digest in snapshot["files"].values()
+        }
+        if not os.path.isdir(self._objects_dir):
+            return
+        for prefix in os.listdir(self._objects_dir):
+            folder = os.path.join(self._objects_dir, prefix)
+            for name in os.listdir(folder):
+                if name not in referenced:
+                    os.remove(os.path.join(folder, name))
+
+    def _object_path(self, digest: str) -> str:
+        return os.path.join(self._objects_dir, digest[:2], digest)
+
+    def _load_index(self) -> Dict:
+        try:
+            with open(self._index_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_index(self, index: Dict) -> None:
+        os.makedirs(self.root, exist_ok=True)
+        temp_path = self._index_path + ".tmp"
+        with open(temp_path, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(temp_path, self._index_path)
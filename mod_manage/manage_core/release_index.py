@@ -0,0 +1,135 @@
+from bisect import bisect_left, bisect_right
+from fnmatch import fnmatchcase
+from typing import Dict, List, Optional
+
+
+def extract_version(tag: str) -> Optional[int]:
+    """从 "nightly-01090-commit_hash" 形式的标签中提取版本号"""
+    if not tag:
+        return
+    parts = tag.split("-")
+    # 确保分割后至少有3部分：["nightly", "01090", "commit_hash"]
+    if len(parts) >= 3 and parts[1].isdigit():
+        return int(parts[1])
+    else:
+        raise ValueError(f"无效的版本标签格式: {tag}")
+
+
+class ReleaseRecord:
+    """
+    单个 Release 的精简记录
+
+    只保留管理器用到的字段和一个按名称选中的资源，解析后原始 JSON 即可丢弃
+    """
+
+    __slots__ = (
+        "id",
+        "name",
+        "version",
+        "tag",
+        "published_at",
+        "url",
+        "digest",
+        "size",
+    )
+
+    def __init__(
+        self,
+        id: int,
+        name: str,
+        version: int,
+        tag: str,
+        published_at: str,
+        url: str,
+        digest: str = None,
+        size: int = None,
+    ):
+        self.id = id
+        self.name = name
+        self.version = version
+        self.tag = tag
+        self.published_at = published_at
+        self.url = url
+        self.digest = digest  # GitHub 提供的 "sha256:<hex>"，旧资源可能缺失
+        self.size = size
+
+    @classmethod
+    def from_github(cls, release: dict, asset_pattern: str) -> "ReleaseRecord":
+        """
+        从 GitHub API 返回的 Release 解析
+
+        :param asset_pattern: 资源文件名的通配模式（不区分大小写）
+        :raises ValueError: 版本号无法解析或没有匹配的资源
+        """
+        tag = release.get("tag_name")
+        version = extract_version(tag)
+        if version is None:
+            raise ValueError(f"无效的版本标签格式: {tag}")
+        pattern = asset_pattern.lower()
+        for asset in release.get("assets") or []:
+            if fnmatchcase(asset.get("name", "").lower(), pattern):
+                break
+        else:
+            raise ValueError(f"{tag} 中没有匹配 {asset_pattern} 的资源")
+        return cls(
+            release["id"],
+            release.get("name"),
+            version,
+            tag,
+            release.get("published_at"),
+            asset.get("browser_download_url"),
+            asset.get("digest"),
+            asset.get("size"),
+        )
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "ReleaseRecord":
+        return cls(**data)
+
+    def to_dict(self) -> dict:
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+
+class ReleaseIndex:
+    """
+    Release 列表的只读索引，每次列表更新时整体重建后替换
+
+    分页、按版本查找和最新版本查询都直接使用记录中已解析的版本号
+    """
+
+    def __init__(self, records: List[ReleaseRecord]):
+        """
+        :param records: Release 记录列表（新的在前）
+        """
+        self.records = records
+        # 同一版本号出现多次时保留列表中靠前（较新）的一个
+        self._by_version: Dict[int, ReleaseRecord] = {
+            record.version: record for record in reversed(records)
+        }
+        self.versions: List[int] = sorted(self._by_version)
+
+    def __len__(self) -> int:
+        return len(self.records)
+
+    def page_count(self, one_page: int) -> int:
+        return -(-len(self.records) // one_page)
+
+    def page(self, one_page: int, page: int) -> List[ReleaseRecord]:
+        return self.records[(page - 1) * one_page : page * one_page]
+
+    def find(self, version: int) -> Optional[ReleaseRecord]:
+        return self._by_version.get(version)
+
+    def latest(self) -> Optional[ReleaseRecord]:
+        """列表中最新发布的一项"""
+        return self.records[0] if self.records else None
+
+    def latest_versions(self, count: int) -> List[ReleaseRecord]:
+        """版本号最大的 count 项，从大到小"""
+        return [self._by_version[v] for v in reversed(self.versions[-count:])]
+
+    def between(self, low: int, high: int) -> List[ReleaseRecord]:
+        """版本号在 [low, high] 内的项，从小到大"""
+        start = bisect_left(self.versions, low)
+        end = bisect_right(self.versions, high)
+        return [self._by_version[v] for v in self.versions[start:end]]
@@ -1,8 +1,35 @@
+import os
+import copy
 import yaml
+import types
+import atexit
+import tempfile
+import threading
+from contextlib import contextmanager
+from functools import lru_cache
+from itertools import repeat
 from pathlib import Path
-from typing import Dict, Any, Type, TypeVar, get_origin, get_args
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Set,
+    Type,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+try:
+    from yaml import CSafeLoader as YamlLoader, CSafeDumper as _FastDumper
+except ImportError:  # 未安装 libyaml 时退回纯 Python 实现
+    from yaml import SafeLoader as YamlLoader, SafeDumper as _FastDumper
 
 T = TypeVar("T", bound="BaseConfig")
+_MISSING = object()
 
 
 class ConfigError(Exception):
@@ -17,8 +44,88 @@ class ConfigValidationError(ConfigError):
     """配置验证失败"""
 
 
+class _NoAliasMixin:
+    """不生成锚点/别名，同一对象被多处引用时仍各自完整输出"""
+
+    def ignore_aliases(self, data):
+        return True
+
+
+class YamlDumper(_NoAliasMixin, _FastDumper):
+    pass
+
+
+class _CompatDumper(_NoAliasMixin, yaml.SafeDumper):
+    pass
+
+
+Validator = Callable[[Any], bool]
+
+
+def _accept_any(value: Any) -> bool:
+    return True
+
+
+@lru_cache(maxsize=None)
+def compile_validator(expected_type: Any, deep: bool = True) -> Validator:
+    """
+    将类型注解编译为校验函数
+
+    支持普通类型、Any、Optional/Union、List/Set/Tuple/Dict 及其任意嵌套；
+    deep=False 时容器只检查自身类型，不逐个检查元素
+    """
+    if expected_type is Any:
+        return _accept_any
+    if expected_type is None or expected_type is type(None):
+        return lambda value: value is None
+
+    origin = get_origin(expected_type)
+    if origin is None:
+        return lambda value: isinstance(value, expected_type)
+
+    args = get_args(expected_type)
+    if origin is Union or origin is getattr(types, "UnionType", Union):
+        checks = tuple(compile_validator(arg, deep) for arg in args)
+        return lambda value: any(check(value) for check in checks)
+
+    if not deep or not args:
+        return lambda value: isinstance(value, origin)
+
+    if origin is dict:
+        check_keys = _compile_items(args[0])
+        check_values = _compile_items(args[1])
+        return lambda value: (
+            isinstance(value, dict)
+            and check_keys(value.keys())
+            and check_values(value.values())
+        )
+
+    if origin is tuple and not (len(args) == 2 and args[1] is Ellipsis):
+        # 定长元组 Tuple[int, str]
+        checks = tuple(compile_validator(arg) for arg in args)
+        return lambda value: (
+            isinstance(value, tuple)
+            and len(value) == len(checks)
+            and all(check(item) for check, item in zip(checks, value))
+        )
+
+    # List[X] / Set[X] / Tuple[X, ...] 等同质容器
+    check_items = _compile_items(args[0])
+    return lambda value: isinstance(value, origin) and check_items(value)
+
+
+def _compile_items(expected_type: Any) -> Callable[[Any], bool]:
+    """编译校验容器全部元素的函数；元素为普通类型时用 map(isinstance) 避免逐个调用 Python 函数"""
+    if expected_type is Any:
+        return _accept_any
+    if get_origin(expected_type) is None and isinstance(expected_type, type):
+        return lambda items: all(map(isinstance, items, repeat(expected_type)))
+    check = compile_validator(expected_type)
+    return lambda items: all(map(check, items))
+
+
 class BaseConfigMeta(type):
-    """元类用于收集配置字段信息"""
+    """元类用于收集配置字段信息，并为每个字段预编译类型校验函数"""
 
     def __new__(cls, name, bases, namespace):
         # 收集类型注解和默认值
@@ -30,10 +137,14 @@ class BaseConfigMeta(type):
                 continue
 
             # 从Field对象中提取信息
+            field_type = annotations.get(attr_name, type(attr_value.default))
             field_info = {
-                "type": annotations.get(attr_name, type(attr_value.default)),
+                "type": field_type,
                 "default": attr_value.default,
                 "description": attr_value.description,
+                "check": compile_validator(field_type),
+                # 延迟校验时只检查容器本身的类型
+                "check_shallow": compile_validator(field_type, deep=False),
             }
             fields[attr_name] = field_info
 
@@ -53,11 +164,28 @@ class Field:
 
 class BaseConfig(metaclass=BaseConfigMeta):
     __config_path__: str = "config.yml"
+    __save_delay__: float = 0.5  # save() 的防抖延迟（秒），0 表示立即写入
+    # 为 True 时赋值只检查容器类型，元素的深度校验推迟到 validate()/保存时进行；
+    # batch() 块内总是推迟，块结束时统一校验
+    __defer_validation__: bool = False
 
     def __init__(self, **kwargs):
+        self._unvalidated: Set[str] = set()
+        self._dirty: Set[str] = set()
+        self._saved: Dict[str, Any] = {}
+        self._save_lock = threading.RLock()
+        self._save_timer = None
+        self._batch_depth = 0
+        self._file_signature = None  # 最近一次读写时配置文件的 (mtime_ns, size, inode)
+        self._subscribers: List[Callable[["BaseConfig", Set[str]], None]] = []
+        self._watcher = None
+        self._watch_stop = threading.Event()
         for name, field in self.__fields__.items():
             value = kwargs.get(name, field["default"])
             setattr(self, name, value)
+        self._mark_clean()
+        # 退出前写入仍在防抖等待中的改动
+        atexit.register(self.flush)
 
     @classmethod
     def load(cls: Type[T]) -> T:
@@ -66,26 +194,255 @@ class BaseConfig(metaclass=BaseConfigMeta):
 
         if not config_path.exists():
             instance = cls()
-            instance.save()
+            instance.flush(force=True)
             return instance
 
+        signature = cls._stat_signature()
+        instance = cls(**cls._validate_config(cls._read_file(config_path)))
+        instance._file_signature = signature
+        return instance
+
+    @staticmethod
+    def _read_file(config_path: Path) -> Dict[str, Any]:
         with open(config_path, "r", encoding="utf-8") as f:
-            raw_data = yaml.safe_load(f)
+            return yaml.load(f, Loader=YamlLoader) or {}
 
-        return cls(**cls._validate_config(raw_data))
+    @classmethod
+    def _stat_signature(cls):
+        try:
+            stat = os.stat(cls.__config_path__)
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size, stat.st_ino
+
+    def reload_if_changed(self) -> Set[str]:
+        """
+        配置文件被外部修改时重新加载
+
+        先比较文件的 (mtime, 大小, inode)，未变化时不读取也不解析；
+        只应用文件中与上次读写时不同的字段（覆盖内存中的值），其余尚未保存的本地修改保留
+        :return: 值发生变化的字段
+        :raises ConfigError: 文件内容无法解析或校验失败（当前值保持不变）
+        """
+        signature = self._stat_signature()
+        if signature is None or signature == self._file_signature:
+            return set()
+        with self._save_lock:
+            try:
+                raw_data = self._read_file(Path(self.__config_path__))
+            except yaml.YAMLError as e:
+                raise ConfigValidationError(f"配置文件解析失败: {e}")
+            data = self._validate_config(raw_data)
+            changed = set()
+            for name, value in data.items():
+                if value == self._file_values[name]:
+                    continue
+                self._file_values[name] = value
+                if name in self._saved:
+                    self._saved[name] = copy.deepcopy(value)
+                self._dirty.discard(name)
+                self._unvalidated.discard(name)
+                if getattr(self, name) != value:
+                    super().__setattr__(name, value)
+                    changed.add(name)
+            self._file_signature = signature
+        if changed:
+            for callback in list(self._subscribers):
+                callback(self, changed)
+        return changed
+
+    def subscribe(self, callback: Callable[["BaseConfig", Set[str]], None]) -> None:
+        """注册重新加载后的回调，调用方式为 callback(config, 变化的字段)"""
+        self._subscribers.append(callback)
+
+    def unsubscribe(self, callback: Callable[["BaseConfig", Set[str]], None]) -> None:
+        if callback in self._subscribers:
+            self._subscribers.remove(callback)
+
+    def watch(self, interval: float = 1.0) -> None:
+        """
+        启动后台轮询线程，每 interval 秒检查一次配置文件并应用外部修改
+
+        每次检查只有一次 stat 调用；文件内容无效时跳过，直到再次被修改
+        """
+        if self._watcher is not None and self._watcher.is_alive():
+            return
+        self._watch_stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch_loop, args=(interval,), name="ConfigWatcher", daemon=True
+        )
+        self._watcher.start()
+
+    def stop_watching(self) -> None:
+        self._watch_stop.set()
+
+    def _watch_loop(self, interval: float) -> None:
+        bad_signature = None
+        while not self._watch_stop.wait(interval):
+            signature = self._stat_signature()
+            if signature == bad_signature:
+                continue
+            try:
+                self.reload_if_changed()
+            except ConfigError:
+                bad_signature = signature
 
     def save(self):
-        """保存为带注释的YAML"""
-        config_path = Path(self.__config_path__)
-        config_path.parent.mkdir(parents=True, exist_ok=True)
+        """
+        保存为带注释的YAML
+
+        没有改动时不写盘；batch() 块内推迟到块结束；否则在 __save_delay__ 秒后
+        由后台线程写入，期间的多次 save() 合并为一次
+        """
+        with self._save_lock:
+            if self._batch_depth:
+                return
+            if self.__save_delay__ <= 0:
+                self.flush()
+                return
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.__save_delay__, self.flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def flush(self, force: bool = False) -> bool:
+        """
+        立即写入尚未保存的改动
+
+        :param force: 即使没有改动也重新写入
+        :return: 是否写入了文件
+        """
+        with self._save_lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            if not force and not self.changed_fields():
+                return False
+            self.validate()
+
+            config_path = Path(self.__config_path__)
+            config_path.parent.mkdir(parents=True, exist_ok=True)
+            yaml_data = self._generate_yaml_with_comments()
+            self._write_atomic(config_path, yaml_data)
+            # 记录自身写入后的文件状态，避免被当作外部修改重新加载
+            self._file_signature = self._stat_signature()
+            self._mark_clean()
+            return True
+
+    @contextmanager
+    def batch(self) -> Iterator["BaseConfig"]:
+        """
+        批量更新配置：块内的 save() 不写盘，块结束后统一校验并保存一次；
+        块内抛出异常或校验失败时所有字段回滚到进入块之前的值，不保存
+        """
+        with self._save_lock:
+            outermost = self._batch_depth == 0
+            if outermost:
+                backup = {
+                    name: copy.deepcopy(getattr(self, name)) for name in self.__fields__
+                }
+                backup_dirty = set(self._dirty)
+                backup_unvalidated = set(self._unvalidated)
+            self._batch_depth += 1
+        try:
+            yield self
+            if outermost:
+                self.validate()
+        except BaseException:
+            if outermost:
+                for name, value in backup.items():
+                    setattr(self, name, value)
+                self._dirty = backup_dirty
+                self._unvalidated = backup_unvalidated
+            raise
+        finally:
+            with self._save_lock:
+                self._batch_depth -= 1
+        if outermost:
+            self.save()
+
+    def validate(self) -> None:
+        """对推迟校验的字段执行完整的类型校验"""
+        # 校验通过后才移出待校验集合，失败的字段在下次 flush 时仍会被拦下
+        for name in list(self._unvalidated):
+            self._raise_if_invalid(name, getattr(self, name), deep=True)
+            self._unvalidated.discard(name)
+
+    def _raise_if_invalid(self, name: str, value: Any, deep: bool) -> None:
+        field = self.__fields__[name]
+        if not field["check" if deep else "check_shallow"](value):
+            raise ConfigTypeError(
+                f"字段 '{name}' 类型错误，应为 {field['type']}，实际为 {type(value)}"
+            )
 
-        yaml_data = self._generate_yaml_with_comments()
+    def changed_fields(self) -> Set[str]:
+        """自上次保存以来修改过的字段（包括就地修改的 dict/list）"""
+        changed = set(self._dirty)
+        for name, saved in self._saved.items():
+            if getattr(self, name) != saved:
+                changed.add(name)
+        return changed
+
+    def _mark_clean(self) -> None:
+        """记录当前值为已保存状态，可变字段保留副本用于检测就地修改"""
+        self._dirty.clear()
+        self._saved = {
+            name: copy.deepcopy(value)
+            for name in self.__fields__
+            if isinstance(value := getattr(self, name), (dict, list))
+        }
+        # 与文件内容一致的各字段值，重新加载时据此区分外部修改和本地未保存的修改
+        self._file_values = {
+            name: self._saved.get(name, getattr(self, name)) for name in self.__fields__
+        }
 
-        with open(config_path, "w", encoding="utf-8") as f:
-            f.write(yaml_data)
+    @staticmethod
+    def _write_atomic(path: Path, data: str) -> None:
+        """写入同目录临时文件后替换，中途崩溃不会留下损坏的配置"""
+        fd, temp_path = tempfile.mkstemp(
+            prefix=f".{path.name}.", suffix=".tmp", dir=path.parent
+        )
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, path)
+        except BaseException:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+            raise
 
     def _generate_yaml_with_comments(self) -> str:
-        """生成带注释的YAML内容"""
+        """
+        生成带注释的YAML内容
+
+        全部字段一次性序列化，再按顶层键切分成块，依字段声明顺序插入注释；
+        输出与逐字段 yaml.dump 的结果逐字节一致
+        """
+        data = {name: getattr(self, name) for name in self.__fields__}
+        document = yaml.dump(
+            data, Dumper=YamlDumper, default_flow_style=False, allow_unicode=True
+        )
+        # libyaml 对双引号字符串的折行及空字符串键的写法与纯 Python 实现不同，
+        # 出现这两种情况时改用纯 Python 实现输出，保证与以往的文件完全一致
+        if _FastDumper is not yaml.SafeDumper and (
+            '"' in document or "'':" in document
+        ):
+            document = yaml.dump(
+                data, Dumper=_CompatDumper, default_flow_style=False, allow_unicode=True
+            )
+
+        # 顶层键位于行首；值的续行均有缩进，块序列的 "- " 不会被当作键
+        chunks: Dict[str, List[str]] = {}
+        current = None
+        for line in document.splitlines():
+            if line and line[0] not in " -":
+                key = line.split(":", 1)[0]
+                if key in self.__fields__:
+                    current = chunks.setdefault(key, [])
+            current.append(line)
+
         lines = []
         for name, field in self.__fields__.items():
             # 添加注释
@@ -93,11 +450,7 @@ class BaseConfig(metaclass=BaseConfigMeta):
             lines.append(f"# {comment}")
 
             # 添加字段值
-            value = getattr(self, name)
-            yaml_line = yaml.dump(
-                {name: value}, default_flow_style=False, allow_unicode=True
-            ).strip()
-            lines.append(yaml_line)
+            lines.append("\n".join(chunks[name]).strip())
 
         return "\n".join(lines)
 
@@ -111,7 +464,7 @@ class BaseConfig(metaclass=BaseConfigMeta):
             value = raw_data.get(name, field_info["default"])
 
             # 类型验证
-            if not cls._check_type(value, field_info["type"]):
+            if not field_info["check"](value):
                 raise ConfigTypeError(
                     f"字段 '{name}' 类型错误，应为 {field_info['type']}，实际为 {type(value)}"
                 )
@@ -123,32 +476,22 @@ class BaseConfig(metaclass=BaseConfigMeta):
     @staticmethod
     def _check_type(value: Any, expected_type: Type) -> bool:
         """类型检查"""
-        # 处理泛型类型（如Dict, List等）
-        origin = get_origin(expected_type)
-        if origin is None:
-            return isinstance(value, expected_type)
-
-        # 处理Dict类型
-        if origin is dict:
-            args = get_args(expected_type)
-            key_type, value_type = args[0], args[1]
-            return (
-                isinstance(value, dict)
-                and all(isinstance(k, key_type) for k in value.keys())
-                and all(isinstance(v, value_type) for v in value.values())
-            )
-
-        # 可以在此添加其他泛型类型的处理
-        return isinstance(value, origin)
+        return compile_validator(expected_type)(value)
 
     def __setattr__(self, name, value):
         """属性设置时的类型检查"""
         if name in self.__fields__:
-            field_type = self.__fields__[name]["type"]
-            if not self._check_type(value, field_type):
-                raise ConfigTypeError(
-                    f"字段 '{name}' 类型错误，应为 {field_type}，实际为 {type(value)}"
-                )
+            field = self.__fields__[name]
+            if self.__defer_validation__ or self._batch_depth:
+                self._raise_if_invalid(name, value, deep=False)
+                if field["check"] is not field["check_shallow"]:
+                    self._unvalidated.add(name)
+            else:
+                self._raise_if_invalid(name, value, deep=True)
+                self._unvalidated.discard(name)
+            current = self.__dict__.get(name, _MISSING)
+            if current is not value and current != value:
+                self._dirty.add(name)
         super().__setattr__(name, value)
 
     def update(self, **kwargs):